@@ -1,22 +1,31 @@
 from flask import Flask
 from .extensions import db, login_manager, migrate, oauth, scheduler
 from .models import User, GlobalSettings, Site, SiteHistory
-from .services.monitor_service import check_sites
+from .services.fragment_cache import fragments
+from .services import profiler
 from config import Config
 import atexit
 import os
+from jinja2 import FileSystemBytecodeCache
 from werkzeug.security import generate_password_hash
 
-def create_app(config_class=Config):
+def create_app(config_class=Config, start_scheduler=None):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Compiled templates survive worker restarts; rendered fragments are cached per process
+    jinja_cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(jinja_cache_dir)}
+    fragments.max_entries = app.config.get('FRAGMENT_CACHE_SIZE', 128)
+
     # Init Extensions
     db.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     migrate.init_app(app, db)
     oauth.init_app(app)
+    profiler.init_app(app)
     
     # Register Blueprints
     from .blueprints.auth import auth_bp
@@ -27,11 +36,15 @@ def create_app(config_class=Config):
     app.register_blueprint(admin_bp)
     app.register_blueprint(main_bp)
 
-    # Scheduler
-    if not scheduler.running:
-        scheduler.add_job(func=check_sites, args=[app], trigger="interval", minutes=1)
-        scheduler.start()
-        atexit.register(lambda: scheduler.shutdown())
+    from .cli import monitor_cli, startup_profile
+    app.cli.add_command(monitor_cli)
+    app.cli.add_command(startup_profile)
+
+    # Scheduler (off for web workers when a dedicated `flask monitor run` process owns monitoring)
+    if start_scheduler is None:
+        start_scheduler = app.config.get('SCHEDULER_ENABLED', True)
+    if start_scheduler:
+        start_monitor_scheduler(app)
 
     # OAuth Registry (Moved from global to here or extensions? Extensions has object, registry needs app context or init)
     # Actually oauth.register can be called anywhere on the oauth object.
@@ -44,21 +57,22 @@ def create_app(config_class=Config):
         name='google',
         client_id=app.config['GOOGLE_CLIENT_ID'],
         client_secret=app.config['GOOGLE_CLIENT_SECRET'],
-        server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+        server_metadata_url=app.config['GOOGLE_DISCOVERY_URL'],
         client_kwargs={'scope': 'openid email profile'},
     )
 
+    usp_base_url = app.config['USP_OAUTH_BASE_URL'].rstrip('/') + '/'
     oauth.register(
         name='usp',
         client_id=app.config['USP_CLIENT_KEY'],
         client_secret=app.config['USP_CLIENT_SECRET'],
-        request_token_url='https://uspdigital.usp.br/wsusuario/oauth/request_token',
+        request_token_url=usp_base_url + 'request_token',
         request_token_params=None,
-        access_token_url='https://uspdigital.usp.br/wsusuario/oauth/access_token',
+        access_token_url=usp_base_url + 'access_token',
         access_token_params=None,
-        authorize_url='https://uspdigital.usp.br/wsusuario/oauth/authorize',
+        authorize_url=usp_base_url + 'authorize',
         authorize_params=None,
-        api_base_url='https://uspdigital.usp.br/wsusuario/oauth/',
+        api_base_url=usp_base_url,
         client_kwargs=None
     )
     
@@ -76,6 +90,15 @@ def create_app(config_class=Config):
 
     return app
 
+def start_monitor_scheduler(app):
+    if scheduler.running:
+        return
+    # Imported here: web workers without a scheduler never load the probe stack
+    from .services.monitor_service import register_jobs
+    register_jobs(scheduler, app)
+    scheduler.start()
+    atexit.register(lambda: scheduler.shutdown() if scheduler.running else None)
+
 def init_db(app):
     with app.app_context():
         db.create_all()
@@ -119,7 +142,14 @@ def init_db(app):
                 smtp_port=int(os.getenv('EMAIL_SMTP_PORT') or 465),
                 interval_weekday=60,
                 interval_weekend=120,
-                alert_threshold=15
+                alert_threshold=15,
+                interval_warning=5,
+                interval_offline=30,
+                cert_warning_days=14,
+                degraded_sensitivity=4.0,
+                degraded_latency_ms=10000,
+                flap_threshold=4,
+                flap_window=60
             )
             db.session.add(settings)
             print("Created default Global Settings.")
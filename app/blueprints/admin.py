@@ -1,11 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, Response,
+                   send_from_directory, abort)
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from ..extensions import db
-from ..models import Site, User, GlobalSettings, SiteHistory
+from ..models import Site, User, GlobalSettings, SiteHistory, MonitorJob, SiteCheck
 
-from ..services.monitor_service import check_sites
+# monitor_service (requests, urllib3, cryptography) is imported inside the views
+# that queue checks, so it stays out of web worker start-up
+from ..services.site_import_service import normalize_url, parse_sites, import_sites, export_sites, ImportFormatError
+from ..services import profiler
+from ..services.stats_service import latency_percentiles
+from ..services.fragment_cache import fragments, data_version
+from ..services.latency_buffer import load_snapshot, sparkline_points
 from ..services.email_service import send_role_update_email
+from ..services.notifier_service import load_stats as load_notification_stats
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -16,21 +24,68 @@ def dashboard():
         flash('Acesso negado. Funcionalidade apenas para administradores ou operadores.', 'danger')
         return redirect(url_for('main.index'))
     
-    sites = Site.query.all()
-    sites = Site.query.all()
-    return render_template('admin.html', sites=sites)
+    # SiteCheck rows are written by the monitor's write-behind flush together
+    # with the batched last_checked updates, so the site version also covers
+    # the latency column; the sparklines come from the monitor's snapshot file
+    recent = load_snapshot()
+    site_rows = fragments.get_or_render(
+        ('admin', data_version(Site), recent['version']),
+        lambda: render_template('fragments/admin_sites.html', sites=Site.query.all(), latency=latency_percentiles(),
+                                recent=recent['sites'], sparkline_points=sparkline_points),
+    )
+    # Resume the progress bar if a forced run is still going
+    active_job = MonitorJob.query.filter(
+        MonitorJob.kind == 'force',
+        MonitorJob.status.in_(['queued', 'running'])
+    ).order_by(MonitorJob.created_at.desc()).first()
+    return render_template('admin.html', site_rows=site_rows, active_job=active_job)
 
-@admin_bp.route('/force_update')
+@admin_bp.route('/force_update', methods=['GET', 'POST'])
 @login_required
 def force_update():
     if current_user.role not in ['admin', 'operator']:
         flash('Acesso negado.', 'danger')
         return redirect(url_for('main.index'))
-        
-    check_sites(current_app._get_current_object(), force=True)
-    flash('Verificação de sites realizada com sucesso!', 'success')
+
+    from ..services.monitor_service import enqueue_forced_check
+
+    # Runs on the scheduler; a second click joins the run already in progress
+    job, created = enqueue_forced_check(current_app._get_current_object())
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(_job_to_dict(job, created=created)), 202
+
+    if created:
+        flash('Verificação de sites iniciada.', 'success')
+    else:
+        flash('Já existe uma verificação em andamento.', 'info')
     return redirect(url_for('admin.dashboard'))
 
+@admin_bp.route('/force_update/<job_id>')
+@login_required
+def force_update_status(job_id):
+    if current_user.role not in ['admin', 'operator']:
+        return jsonify({'error': 'Acesso negado.'}), 403
+
+    job = MonitorJob.query.get(job_id)
+    if not job:
+        return jsonify({'error': 'Verificação não encontrada.'}), 404
+    return jsonify(_job_to_dict(job))
+
+def _job_to_dict(job, **extra):
+    data = {
+        'id': job.id,
+        'status': job.status,
+        'total': job.total or 0,
+        'done': job.done or 0,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'error': job.error_message,
+        'status_url': url_for('admin.force_update_status', job_id=job.id),
+    }
+    data.update(extra)
+    return data
+
 @admin_bp.route('/site/add', methods=['POST'])
 @login_required
 def add_site():
@@ -43,20 +98,14 @@ def add_site():
     expected_text = request.form.get('expected_text')
     
     if name and url:
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        from ..services.monitor_service import schedule_site_check
+
+        url = normalize_url(url)
         new_site = Site(name=name, url=url, expected_text=expected_text)
         db.session.add(new_site)
         db.session.commit()
-        # Check immediately. Need to pass app from current_app._get_current_object() or similar?
-        # check_sites() expects 'app' to create context.
-        # But inside a route we Are in context.
-        # Let's Modify check_sites to handle being called within context or accept app.
-        # Re-using the service directly.
-        
-        # NOTE: logic in service uses "with app.app_context()".
-        # We can pass current_app._get_current_object()
-        check_sites(current_app._get_current_object())
+        # Check just this site, in the background
+        schedule_site_check(current_app._get_current_object(), new_site.id)
         
     return redirect(url_for('admin.dashboard'))
 
@@ -75,6 +124,9 @@ def delete_site(id):
             record.site_id = None
             if not record.site_name:
                 record.site_name = site.name
+
+        SiteCheck.query.filter_by(site_id=site.id).delete()
+        Site.query.filter_by(parent_id=site.id).update({'parent_id': None})
                 
         db.session.delete(site)
         db.session.commit()
@@ -89,16 +141,111 @@ def edit_site(id):
 
     site = Site.query.get(id)
     if request.method == 'POST':
+        from ..services.monitor_service import schedule_site_check, clear_validators
+
+        old_target = (site.url, site.expected_text)
         site.name = request.form.get('name')
-        site.url = request.form.get('url')
-        if not site.url.startswith(('http://', 'https://')):
-            site.url = 'https://' + site.url
+        site.url = normalize_url(request.form.get('url'))
         site.expected_text = request.form.get('expected_text')
+        if (site.url, site.expected_text) != old_target:
+            clear_validators(site)
+        site.check_interval = request.form.get('check_interval', type=int)
+        site.retry_interval = request.form.get('retry_interval', type=int)
+        parent_id = request.form.get('parent_id', type=int)
+        if parent_id in {candidate.id for candidate in _parent_candidates(site)}:
+            site.parent_id = parent_id
+        else:
+            site.parent_id = None
         db.session.commit()
         
-        check_sites(current_app._get_current_object())
+        schedule_site_check(current_app._get_current_object(), site.id)
+        return redirect(url_for('admin.dashboard'))
+    return render_template('edit_site.html', site=site, parent_candidates=_parent_candidates(site))
+
+def _parent_candidates(site):
+    # Any other site except its own dependents, which would close a cycle
+    children = {}
+    for other in Site.query.all():
+        children.setdefault(other.parent_id, []).append(other.id)
+    excluded, pending = {site.id}, [site.id]
+    while pending:
+        for child_id in children.get(pending.pop(), []):
+            if child_id not in excluded:
+                excluded.add(child_id)
+                pending.append(child_id)
+    return Site.query.filter(Site.id.notin_(excluded)).order_by(Site.name).all()
+
+@admin_bp.route('/sites/export')
+@login_required
+def export_sites_file():
+    if current_user.role not in ['admin', 'operator']:
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('main.index'))
+
+    fmt = request.args.get('format', 'csv')
+    try:
+        body = export_sites(fmt)
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mimetype = 'application/json' if fmt == 'json' else 'text/csv'
+    return Response(body, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=sites.{fmt}'})
+
+@admin_bp.route('/sites/import', methods=['POST'])
+@login_required
+def import_sites_file():
+    """
+    Bulk import of sites from CSV or JSON, either as an uploaded file
+    (field 'file') or as the raw request body. `dry_run=1` only validates
+    and reports duplicates. Answers JSON to API clients, flashes otherwise.
+    """
+    wants_json = request.is_json or request.accept_mimetypes.best == 'application/json'
+    if current_user.role not in ['admin', 'operator']:
+        if wants_json:
+            return jsonify({'error': 'Acesso negado.'}), 403
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('main.index'))
+
+    upload = request.files.get('file')
+    if upload and upload.filename:
+        raw = upload.read()
+        fmt = request.form.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+    else:
+        raw = request.get_data()
+        fmt = request.args.get('format') or ('json' if request.is_json else 'csv')
+    dry_run = request.values.get('dry_run', '').lower() in ('1', 'true', 'on', 'yes')
+
+    try:
+        report = import_sites(parse_sites(raw, fmt), dry_run=dry_run)
+    except ImportFormatError as e:
+        if wants_json:
+            return jsonify({'error': str(e)}), 400
+        flash(f'Erro na importação: {e}', 'danger')
         return redirect(url_for('admin.dashboard'))
-    return render_template('edit_site.html', site=site)
+
+    if report['created_ids']:
+        from ..services.monitor_service import schedule_sites_check
+
+        # One concurrent initial probe of just the new sites
+        schedule_sites_check(current_app._get_current_object(), report['created_ids'])
+
+    if wants_json:
+        if report['created_ids']:
+            status = 201
+        elif report['errors'] and not report['created']:
+            status = 422 # Nothing importable, and not only because of duplicates
+        else:
+            status = 200 # Dry run, or every site already registered
+        return jsonify(report), status
+
+    prefix = 'Simulação: ' if dry_run else ''
+    flash(f"{prefix}{report['created']} site(s) importado(s), "
+          f"{len(report['duplicates'])} duplicado(s), {len(report['errors'])} erro(s).",
+          'warning' if report['errors'] else 'success')
+    for err in report['errors'][:10]:
+        flash(f"Linha {err['row']}: {err['error']}", 'danger')
+    return redirect(url_for('admin.dashboard'))
 
 @admin_bp.route('/settings', methods=['GET', 'POST'])
 @login_required
@@ -116,13 +263,87 @@ def settings():
         settings.smtp_server = request.form.get('smtp_server')
         settings.smtp_port = int(request.form.get('smtp_port'))
         settings.interval_weekday = int(request.form.get('interval_weekday'))
+        settings.interval_weekend = int(request.form.get('interval_weekend'))
+        settings.interval_warning = int(request.form.get('interval_warning'))
+        settings.interval_offline = int(request.form.get('interval_offline'))
         settings.alert_threshold = int(request.form.get('alert_threshold'))
+        settings.cert_warning_days = int(request.form.get('cert_warning_days'))
+        settings.degraded_sensitivity = float(request.form.get('degraded_sensitivity'))
+        settings.degraded_latency_ms = int(request.form.get('degraded_latency_ms'))
+        settings.flap_threshold = int(request.form.get('flap_threshold'))
+        settings.flap_window = int(request.form.get('flap_window'))
+        settings.webhook_url = request.form.get('webhook_url', '').strip() or None
+        settings.chat_webhook_url = request.form.get('chat_webhook_url', '').strip() or None
         db.session.commit()
         flash('Configurações atualizadas com sucesso!')
         return redirect(url_for('admin.settings'))
         
     return render_template('settings.html', settings=settings)
 
+# --- Profiling ---
+
+@admin_bp.route('/profiles', methods=['GET', 'POST'])
+@login_required
+def profiles():
+    if current_user.role != 'admin':
+        flash('Acesso negado. Apenas administradores podem gerar perfis de desempenho.', 'danger')
+        return redirect(url_for('main.index'))
+
+    if request.method == 'POST':
+        target = request.form.get('target')
+        mode = request.form.get('mode')
+        count = request.form.get('count', type=int) or 1
+        route = request.form.get('route', '').strip() or None
+        if target not in profiler.TARGETS or mode not in profiler.MODES:
+            flash('Opção de perfil inválida.', 'danger')
+        elif target == 'route' and not (route and route.startswith('/')):
+            flash('Informe o caminho da rota, começando com /.', 'danger')
+        else:
+            profiler.arm(target, mode, min(max(count, 1), 20), route=route, armed_by=current_user.username)
+            flash('Perfil agendado. Os arquivos aparecem abaixo conforme forem capturados.')
+        return redirect(url_for('admin.profiles'))
+
+    return render_template('profiles.html', armed=profiler.armed(), profiles=profiler.profiles())
+
+@admin_bp.route('/profiles/disarm', methods=['POST'])
+@login_required
+def disarm_profile():
+    if current_user.role != 'admin':
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('main.index'))
+    profiler.disarm()
+    flash('Captura de perfil cancelada.')
+    return redirect(url_for('admin.profiles'))
+
+@admin_bp.route('/profiles/download/<path:name>')
+@login_required
+def download_profile(name):
+    if current_user.role != 'admin':
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('main.index'))
+    if name not in {item['name'] for item in profiler.profiles()}:
+        abort(404)
+    return send_from_directory(profiler.profile_dir(), name, as_attachment=True)
+
+@admin_bp.route('/profiles/delete/<path:name>', methods=['POST'])
+@login_required
+def delete_profile(name):
+    if current_user.role != 'admin':
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('main.index'))
+    profiler.delete_profile(name)
+    return redirect(url_for('admin.profiles'))
+
+# --- Notifications ---
+
+@admin_bp.route('/notifications')
+@login_required
+def notification_stats():
+    if current_user.role != 'admin':
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('main.index'))
+    return render_template('notifications.html', stats=load_notification_stats())
+
 # --- User Management ---
 
 @admin_bp.route('/users')
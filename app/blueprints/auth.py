@@ -4,6 +4,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from ..extensions import db, login_manager, oauth
 from ..models import User, GlobalSettings
 from ..services.email_service import send_new_user_admin_notification, send_welcome_email
+from ..services.oauth_metadata_service import ensure_metadata
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -78,11 +79,13 @@ def google_login():
     # We need to ensure 'google' is registered on oauth in extensions or factory.
     # It will be accessible via oauth.google
     redirect_uri = url_for('auth.google_authorize', _external=True)
+    ensure_metadata(oauth.google, 'google', current_app.config['GOOGLE_DISCOVERY_URL'])
     return oauth.google.authorize_redirect(redirect_uri)
 
 @auth_bp.route('/login/google/callback')
 def google_authorize():
     try:
+        ensure_metadata(oauth.google, 'google', current_app.config['GOOGLE_DISCOVERY_URL'])
         token = oauth.google.authorize_access_token()
         user_info = oauth.google.userinfo()
         email = user_info['email']
@@ -1,13 +1,33 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
+from flask import Blueprint, render_template, redirect, url_for, flash, session, jsonify
 from flask_login import login_required, current_user
 from ..models import Site, SiteHistory
+from ..services import status_page
+from ..services.fragment_cache import fragments, data_version
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
 def index():
-    sites = Site.query.order_by(Site.name).all()
-    return render_template('index.html', sites=sites)
+    # Anonymous viewers get the page pre-rendered by the monitor, without touching the DB
+    if not current_user.is_authenticated and '_flashes' not in session:
+        response = status_page.serve(status_page.STATUS_HTML, 'text/html')
+        if response is not None:
+            return response
+
+    # Status cards are re-rendered only when a site row changes
+    site_cards = fragments.get_or_render(
+        ('index', data_version(Site)),
+        lambda: render_template('fragments/site_cards.html', sites=Site.query.order_by(Site.name).all()),
+    )
+    return render_template('index.html', site_cards=site_cards)
+
+@main_bp.route('/status.json')
+def status_json():
+    response = status_page.serve(status_page.STATUS_JSON, 'application/json')
+    if response is not None:
+        return response
+    # Not published yet (monitor never ran)
+    return jsonify({'generated_at': None, 'sites': []})
 
 @main_bp.route('/reports')
 @login_required
@@ -16,9 +36,17 @@ def reports():
         flash('Acesso negado.', 'danger')
         return redirect(url_for('main.index'))
     
+    # Rows show the current site name/url, so site changes invalidate them too
+    history_rows = fragments.get_or_render(
+        ('reports', current_user.role, data_version(SiteHistory, Site)),
+        lambda: render_template('fragments/history_rows.html', history=_enriched_history()),
+    )
+    return render_template('reports.html', history_rows=history_rows)
+
+def _enriched_history():
     # Fetch offline events sorted by start_time desc
     history = SiteHistory.query.order_by(SiteHistory.start_time.desc()).all()
-    
+
     # Calculate duration for display
     enriched_history = []
     for h in history:
@@ -41,7 +69,7 @@ def reports():
             'error': h.error_message
         })
             
-    return render_template('reports.html', history=enriched_history)
+    return enriched_history
 
 @main_bp.route('/reports/pdf')
 @login_required
@@ -0,0 +1,221 @@
+import signal
+import sys
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+monitor_cli = AppGroup('monitor', help='Comandos do serviço de monitoramento.')
+
+@monitor_cli.command('run')
+def run():
+    """Executa o agendador de monitoramento em um processo dedicado."""
+    from . import start_monitor_scheduler
+    from .extensions import scheduler
+    from .services.write_behind import write_behind
+    from .services.notifier_service import dispatcher
+
+    # docker stop / redeploys send SIGTERM (PID 1 in the container): exit through
+    # the same shutdown path as Ctrl-C instead of dying with unwritten batches
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    # The only process checking sites, so check times can be written in batches
+    write_behind.enabled = True
+    # Already running if this app was created with SCHEDULER_ENABLED=true
+    start_monitor_scheduler(current_app._get_current_object())
+    print(f"Monitor running: {', '.join(job.id for job in scheduler.get_jobs())}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # A second signal must not cut the shutdown short
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        print("Monitor stopping")
+        scheduler.shutdown()
+        # Check times and timings still waiting for their batched write
+        write_behind.flush()
+        # Queued and retrying notifications; keep within the compose stop_grace_period
+        if not dispatcher.drain(timeout=current_app.config.get('NOTIFY_DRAIN_TIMEOUT', 30)):
+            pending = sum(stats['queued'] + stats['retrying'] for stats in dispatcher.stats().values())
+            print(f"Shutting down with {pending} notification(s) still pending; they were not sent")
+
+@monitor_cli.command('agent')
+@click.option('--id', 'agent_id', default=None, help='Identificador do agente (padrão: host:pid).')
+@click.option('--batch', 'batch_size', type=int, default=None, help='Tarefas reservadas por vez.')
+@click.option('--lease', 'lease_seconds', type=int, default=120, show_default=True,
+              help='Tempo de reserva (s) antes que outra instância possa assumir a tarefa.')
+@click.option('--poll', 'poll_seconds', type=float, default=5, show_default=True,
+              help='Espera (s) quando a fila está vazia.')
+@click.option('--once', is_flag=True, help='Sai quando a fila estiver vazia.')
+def agent(agent_id, batch_size, lease_seconds, poll_seconds, once):
+    """Executa um agente de verificação (MONITOR_PROBE_MODE=agents)."""
+    from .extensions import scheduler
+    from .services.agent_service import run_agent
+
+    # Agents only probe; scheduling stays with the monitor process.
+    # Run them with SCHEDULER_ENABLED=false to skip starting it at all.
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+
+    run_agent(current_app._get_current_object(), agent_id=agent_id, batch_size=batch_size,
+              lease_seconds=lease_seconds, poll_seconds=poll_seconds, once=once)
+
+@monitor_cli.command('notify-test')
+@click.option('--channel', type=click.Choice(['email', 'webhook', 'chat']), default=None,
+              help='Testa apenas este tipo de canal.')
+@click.option('--wait', type=float, default=60, show_default=True, help='Espera máxima (s) pelas entregas.')
+def notify_test(channel, wait):
+    """Envia uma notificação de teste pelos canais configurados."""
+    from .models import GlobalSettings
+    from .services.notifier_service import Notification, TEST, channels_for, dispatcher, notify
+
+    settings = GlobalSettings.query.first()
+    channels = [c for c in channels_for(settings) if channel in (None, c.kind)]
+    if not channels:
+        raise click.ClickException('Nenhum canal de notificação configurado.')
+
+    notification = Notification(TEST, 'TESTE: Monitor de Sites', 'Notificação de teste enviada pelo Monitor de Sites.')
+    notify(notification, settings, channels=channels)
+    finished = dispatcher.drain(timeout=wait)
+
+    print(f"{'Canal':<8} {'enviadas':>8} {'falhas':>6} {'tentativas extras':>17} {'p50 ms':>7} {'p95 ms':>7}")
+    for kind, stats in dispatcher.stats().items():
+        print(f"{kind:<8} {stats['sent']:>8} {stats['failed']:>6} {stats['retries']:>17} "
+              f"{stats['p50_ms'] if stats['p50_ms'] is not None else '-':>7} "
+              f"{stats['p95_ms'] if stats['p95_ms'] is not None else '-':>7}")
+    if not finished:
+        raise click.ClickException(f"Entregas ainda pendentes após {wait:.0f} s.")
+    if any(stats['failed'] for stats in dispatcher.stats().values()):
+        raise click.ClickException('Falha em ao menos um canal.')
+
+def _int_list(ctx, param, value):
+    # "5,10,15" -> [5, 10, 15]; None keeps the current setting
+    if value is None:
+        return None
+    try:
+        return [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise click.BadParameter('use números inteiros separados por vírgula, ex.: 5,10,15')
+
+@monitor_cli.command('replay')
+@click.option('--synthetic', 'synthetic_sites', type=int, default=None,
+              help='Simula este número de sites em vez de usar as verificações registradas.')
+@click.option('--days', type=int, default=None, help='Período reproduzido (padrão: 90 sintético, retenção registrada).')
+@click.option('--threshold', callback=_int_list, help='Valores de alert_threshold (min), ex.: 5,10,15.')
+@click.option('--weekday', callback=_int_list, help='Valores de interval_weekday (min).')
+@click.option('--weekend', callback=_int_list, help='Valores de interval_weekend (min).')
+@click.option('--warning', callback=_int_list, help='Valores de interval_warning (min).')
+@click.option('--offline', callback=_int_list, help='Valores de interval_offline (min).')
+@click.option('--flap-threshold', callback=_int_list, help='Valores de flap_threshold (0 desativa).')
+@click.option('--flap-window', callback=_int_list, help='Valores de flap_window (min).')
+@click.option('--min-outage', type=float, default=10, show_default=True,
+              help='Quedas mais curtas (min) não deveriam gerar alerta.')
+@click.option('--outages-per-week', type=float, default=1.0, show_default=True, help='Sintético: quedas por site.')
+@click.option('--mean-outage', type=float, default=45, show_default=True, help='Sintético: duração média (min).')
+@click.option('--blips-per-day', type=float, default=2.0, show_default=True,
+              help='Sintético: falhas passageiras (< 3 min) por site.')
+@click.option('--seed', type=int, default=42, show_default=True)
+@click.option('--json', 'json_path', type=click.Path(dir_okay=False), help='Salva os resultados neste arquivo.')
+def replay(synthetic_sites, days, threshold, weekday, weekend, warning, offline, flap_threshold, flap_window,
+           min_outage, outages_per_week, mean_outage, blips_per_day, seed, json_path):
+    """Simula configurações de alerta sobre verificações registradas ou sintéticas."""
+    import json
+    from .models import GlobalSettings
+    from .services import replay_service
+
+    settings = GlobalSettings.query.first()
+    if not settings:
+        raise click.ClickException('Configurações globais não encontradas.')
+
+    started = time.perf_counter()
+    if synthetic_sites:
+        traces = replay_service.synthetic_traces(synthetic_sites, days or 90, outages_per_week=outages_per_week,
+                                                 mean_outage_minutes=mean_outage, blips_per_day=blips_per_day,
+                                                 seed=seed)
+    else:
+        traces = replay_service.recorded_traces(days or current_app.config.get('MONITOR_TIMING_RETENTION_DAYS', 7))
+    if not traces:
+        raise click.ClickException('Nenhuma verificação registrada no período.')
+
+    options = (threshold, weekday, weekend, warning, offline, flap_threshold, flap_window)
+    grid = {key: values for key, values in zip(replay_service.TUNABLE, options) if values}
+    results = replay_service.backtest(traces, settings, grid, min_outage_minutes=min_outage)
+    elapsed = time.perf_counter() - started
+
+    span_days = sum((trace.end - trace.start).total_seconds() for trace in traces) / 86400
+    print(f"{len(traces)} site(s), {span_days:.0f} site-dias reproduzidos em {elapsed:.1f} s")
+    print(f"{'limite':>6} {'semana':>6} {'fds':>5} {'aviso':>5} {'offline':>7} {'instab.':>8} | {'alertas':>7} "
+          f"{'instáveis':>9} {'quedas':>6} {'detect.':>7} {'perdidas':>8} {'falsos':>6} {'atraso médio':>12} "
+          f"{'p95':>6} {'verificações':>12}")
+    delay = lambda value: '-' if value is None else f"{value:.1f}"
+    for result in results:
+        s = result['settings']
+        flap = f"{s['flap_threshold']}/{s['flap_window']}" if s['flap_threshold'] else '-'
+        print(f"{s['alert_threshold']:>6} {s['interval_weekday']:>6} {s['interval_weekend']:>5} "
+              f"{s['interval_warning']:>5} {s['interval_offline']:>7} {flap:>8} | {result['alerts']:>7} "
+              f"{result['flapping']:>9} {result['outages']:>6} {result['detected']:>7} {result['missed']:>8} "
+              f"{result['false_positives']:>6} {delay(result['delay_mean']):>12} {delay(result['delay_p95']):>6} "
+              f"{result['probes']:>12}")
+    print("Atrasos em minutos desde o início da queda; instab. = mudanças/janela (min).")
+
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'sites': len(traces), 'min_outage': min_outage, 'results': results}, f, indent=2)
+
+# Runs in a fresh interpreter, like a newly forked web worker
+_STARTUP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+finished = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_app_ms': (finished - imported) * 1000}))
+"""
+
+def _import_times(stderr):
+    # Self time per top-level package from `python -X importtime` output, in ms
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _cumulative, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us) / 1000
+    return packages
+
+@click.command('startup-profile')
+@click.option('--budget', 'budget_ms', type=int, default=None,
+              help='Tempo máximo (ms) de inicialização; padrão STARTUP_BUDGET_MS.')
+@click.option('--top', type=int, default=15, show_default=True, help='Pacotes listados.')
+def startup_profile(budget_ms, top):
+    """Mede o tempo de importação e de create_app de um novo worker."""
+    import json
+    import os
+    import subprocess
+
+    budget_ms = budget_ms or current_app.config.get('STARTUP_BUDGET_MS', 1000)
+    root = os.path.dirname(current_app.root_path)
+    # As the web workers are run (see docker-compose.yml): the measured app must
+    # not start its own scheduler, which would check sites and send alerts
+    env = {**os.environ, 'SCHEDULER_ENABLED': 'false'}
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _STARTUP_SCRIPT],
+                          cwd=root, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise click.ClickException(f"Falha ao iniciar a aplicação:\n{proc.stderr[-2000:]}")
+
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    total_ms = timings['import_ms'] + timings['create_app_ms']
+
+    print(f"{'Pacote':<30} {'ms':>8}")
+    packages = sorted(_import_times(proc.stderr).items(), key=lambda item: item[1], reverse=True)
+    for package, ms in packages[:top]:
+        print(f"{package:<30} {ms:>8.1f}")
+    print()
+    print(f"import app:  {timings['import_ms']:8.1f} ms")
+    print(f"create_app:  {timings['create_app_ms']:8.1f} ms")
+    print(f"total:       {total_ms:8.1f} ms (orçamento {budget_ms} ms)")
+
+    if total_ms > budget_ms:
+        raise click.ClickException(f"Inicialização acima do orçamento: {total_ms:.0f} ms > {budget_ms} ms")
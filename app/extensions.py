@@ -1,11 +1,66 @@
+import threading
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
-from authlib.integrations.flask_client import OAuth
-from apscheduler.schedulers.background import BackgroundScheduler
+
+class _Lazy:
+    """
+    Stands in for an extension whose import is costly and which most web
+    workers never touch. The real object is built on first attribute access.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+class LazyScheduler(_Lazy):
+    # APScheduler is only imported by processes that actually schedule jobs
+
+    @property
+    def running(self):
+        return self._instance is not None and self._instance.running
+
+def _build_scheduler():
+    from apscheduler.schedulers.background import BackgroundScheduler
+    return BackgroundScheduler()
+
+class LazyOAuth(_Lazy):
+    """
+    Authlib (with requests, cryptography and JOSE behind it) is only imported
+    on the first OAuth login. init_app/register are recorded and replayed.
+    """
+
+    def __init__(self):
+        super().__init__(self._build)
+        self._app = None
+        self._clients = []
+
+    def init_app(self, app):
+        self._app = app
+
+    def register(self, name, **kwargs):
+        self._clients.append((name, kwargs))
+
+    def _build(self):
+        from authlib.integrations.flask_client import OAuth
+        oauth = OAuth(self._app)
+        for name, kwargs in self._clients:
+            oauth.register(name, **kwargs)
+        return oauth
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 migrate = Migrate()
-oauth = OAuth()
-scheduler = BackgroundScheduler()
+oauth = LazyOAuth()
+scheduler = LazyScheduler(_build_scheduler)
@@ -22,6 +22,25 @@ class Site(db.Model):
     first_failure_time = db.Column(db.DateTime, nullable=True)
     last_checked = db.Column(db.DateTime, nullable=True)
     error_message = db.Column(db.String(500), nullable=True)
+    # Optional per-site cadence overrides (in minutes). NULL = use GlobalSettings.
+    check_interval = db.Column(db.Integer, nullable=True) # While online
+    retry_interval = db.Column(db.Integer, nullable=True) # While in warning
+    # Conditional probe cache: validators + body hash of the last 200 response,
+    # and whether expected_text was found in it
+    etag = db.Column(db.String(200), nullable=True)
+    last_modified = db.Column(db.String(100), nullable=True)
+    content_hash = db.Column(db.String(32), nullable=True)
+    text_match = db.Column(db.Boolean, nullable=True)
+    # Circuit breaker: consecutive failed probes while offline; backs off the cadence
+    breaker_failures = db.Column(db.Integer, nullable=False, default=0)
+    # Dependency (another site, e.g. a tcp://host:port host check): while it is
+    # down this site is marked unreachable instead of probed, and does not alert
+    parent_id = db.Column(db.Integer, db.ForeignKey('site.id'), nullable=True, index=True)
+    parent = db.relationship('Site', remote_side=[id], backref='children')
+    # Flap detection: recent offline ("d<epoch>") / recovery ("u<epoch>") bounces
+    recent_transitions = db.Column(db.Text, nullable=True)
+    # Bumped by every UPDATE; together with the row count it versions cached fragments
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
 
 class SiteHistory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -32,6 +51,49 @@ class SiteHistory(db.Model):
     start_time = db.Column(db.DateTime, nullable=False, default=datetime.now)
     end_time = db.Column(db.DateTime, nullable=True)
     error_message = db.Column(db.String(500), nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.now, onupdate=datetime.now, index=True)
+
+class SiteCheck(db.Model):
+    # One row per probe: outcome and phase timings in ms (NULL = phase skipped,
+    # e.g. no DNS/connect/TLS on a reused keep-alive connection)
+    id = db.Column(db.Integer, primary_key=True)
+    site_id = db.Column(db.Integer, db.ForeignKey('site.id'), nullable=False, index=True)
+    checked_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+    ok = db.Column(db.Boolean, nullable=False)
+    dns_ms = db.Column(db.Integer, nullable=True)
+    connect_ms = db.Column(db.Integer, nullable=True)
+    tls_ms = db.Column(db.Integer, nullable=True)
+    ttfb_ms = db.Column(db.Integer, nullable=True)
+    transfer_ms = db.Column(db.Integer, nullable=True)
+    total_ms = db.Column(db.Integer, nullable=True)
+
+class ProbeTask(db.Model):
+    # Work queue for probe agents (MONITOR_PROBE_MODE=agents). The monitor
+    # enqueues due sites; agents lease, probe and store a JSON result that the
+    # monitor then applies to the site.
+    id = db.Column(db.Integer, primary_key=True)
+    site_id = db.Column(db.Integer, nullable=False, index=True)
+    job_id = db.Column(db.String(32), nullable=True) # MonitorJob being tracked, if any
+    url = db.Column(db.String(500), nullable=False)
+    expected_text = db.Column(db.String(200), nullable=True)
+    validators = db.Column(db.Text, nullable=True) # JSON, see probe_service.Validators
+    timeout = db.Column(db.Float, nullable=True) # Seconds; NULL = probe default
+    breaker_timeout = db.Column(db.Float, nullable=True) # Circuit open: TCP check with this timeout first
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True) # queued, leased, done
+    agent_id = db.Column(db.String(100), nullable=True)
+    lease_until = db.Column(db.DateTime, nullable=True) # Visibility timeout while leased
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    result = db.Column(db.Text, nullable=True) # JSON, see probe_service.ProbeResult
+
+class CertStatus(db.Model):
+    # TLS certificate expiry per host, refreshed at most once a day
+    host = db.Column(db.String(255), primary_key=True) # 'example.com:443'
+    expires_at = db.Column(db.DateTime, nullable=True)
+    checked_at = db.Column(db.DateTime, nullable=False)
+    error_message = db.Column(db.String(500), nullable=True) # Handshake/verification failure
+    notified_at = db.Column(db.DateTime, nullable=True)
 
 class GlobalSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -46,3 +108,31 @@ class GlobalSettings(db.Model):
     interval_weekday = db.Column(db.Integer, default=60)
     interval_weekend = db.Column(db.Integer, default=120)
     alert_threshold = db.Column(db.Integer, default=15)
+    interval_warning = db.Column(db.Integer, default=5) # Retry cadence while in warning
+    interval_offline = db.Column(db.Integer, default=30) # Back-off cadence once offline
+    cert_warning_days = db.Column(db.Integer, default=14) # Warn when a TLS cert expires within N days
+    # Degraded (slow) state: robust z-score of recent latency vs the site's own history,
+    # and an absolute ceiling in ms. 0 disables either check.
+    degraded_sensitivity = db.Column(db.Float, default=4.0)
+    degraded_latency_ms = db.Column(db.Integer, default=10000)
+    # Flapping: this many offline/recovery bounces within flap_window minutes merge
+    # into one incident with a single notification. 0 disables.
+    flap_threshold = db.Column(db.Integer, default=4)
+    flap_window = db.Column(db.Integer, default=60)
+    # Extra notification channels (besides email); NULL = disabled
+    webhook_url = db.Column(db.String(500), nullable=True) # JSON POST of every notification
+    chat_webhook_url = db.Column(db.String(500), nullable=True) # Slack/Teams-compatible {"text": ...}
+
+class MonitorJob(db.Model):
+    # On-demand monitoring run queued from the web UI and executed by the scheduler
+    id = db.Column(db.String(32), primary_key=True) # uuid4 hex
+    kind = db.Column(db.String(20), nullable=False) # 'force' (full run) or 'sites' (site_ids only)
+    site_ids = db.Column(db.Text, nullable=True) # Comma-separated, for kind='sites'
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, running, done, failed
+    total = db.Column(db.Integer, default=0) # Sites to check
+    done = db.Column(db.Integer, default=0) # Sites checked so far
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    error_message = db.Column(db.String(500), nullable=True)
@@ -0,0 +1,168 @@
+import json
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from ..extensions import db
+from ..models import ProbeTask
+from . import probe_service
+from .probe_service import probe_site, result_to_dict, result_from_dict, Validators
+
+# A task whose lease expired this many times is dropped (and re-enqueued
+# by the next tick) instead of being handed out again
+MAX_ATTEMPTS = 3
+
+# --- Monitor side ---
+
+def enqueue_probe_tasks(sites, job_id=None, options_of=None):
+    """
+    Queues one probe task per site, skipping sites that already have a task
+    in flight. `options_of(site)` gives the probe_site() timeout options.
+    Returns the number of tasks created. Caller commits.
+    """
+    pending = {
+        site_id for (site_id,) in db.session.query(ProbeTask.site_id)
+        .filter(ProbeTask.status.in_(['queued', 'leased']))
+    }
+    created = 0
+    for site in sites:
+        if site.id in pending:
+            continue
+        options = options_of(site) if options_of else {}
+        db.session.add(ProbeTask(
+            site_id=site.id,
+            job_id=job_id,
+            url=site.url,
+            expected_text=site.expected_text,
+            validators=json.dumps(asdict(Validators(
+                etag=site.etag,
+                last_modified=site.last_modified,
+                content_hash=site.content_hash,
+                text_match=site.text_match,
+            ))),
+            timeout=options.get('timeout'),
+            breaker_timeout=options.get('breaker_timeout'),
+            status='queued',
+            created_at=datetime.now(),
+        ))
+        created += 1
+    return created
+
+def take_finished_tasks():
+    """
+    Removes and returns finished tasks as (site_id, job_id, ProbeResult)
+    tuples, oldest first. Also drops tasks that exhausted their attempts.
+    Each task is claimed by a conditional DELETE, so when two collectors
+    overlap (the tick and the collect job) every result is taken once.
+    Caller commits.
+    """
+    finished = (
+        db.session.query(ProbeTask.id, ProbeTask.site_id, ProbeTask.job_id, ProbeTask.result)
+        .filter_by(status='done').order_by(ProbeTask.finished_at).all()
+    )
+    results = []
+    for task_id, site_id, job_id, result in finished:
+        claimed = ProbeTask.query.filter_by(id=task_id, status='done').delete(synchronize_session=False)
+        if claimed:
+            results.append((site_id, job_id, result_from_dict(json.loads(result))))
+
+    abandoned = ProbeTask.query.filter(
+        ProbeTask.status == 'leased',
+        ProbeTask.lease_until < datetime.now(),
+        ProbeTask.attempts >= MAX_ATTEMPTS,
+    ).delete(synchronize_session=False)
+    if abandoned:
+        print(f"Dropped {abandoned} probe task(s) no agent could finish")
+
+    return results
+
+# --- Agent side ---
+
+def lease_tasks(agent_id, limit, lease_seconds):
+    """
+    Atomically leases up to `limit` queued (or lease-expired) tasks. Each
+    claim is a conditional UPDATE, so concurrent agents never get the same
+    task. Returns plain dicts, safe to use outside the session.
+    """
+    now = datetime.now()
+    available = or_(
+        ProbeTask.status == 'queued',
+        and_(ProbeTask.status == 'leased', ProbeTask.lease_until < now, ProbeTask.attempts < MAX_ATTEMPTS),
+    )
+    candidates = [
+        task_id for (task_id,) in db.session.query(ProbeTask.id)
+        .filter(available).order_by(ProbeTask.id).limit(limit * 2)
+    ]
+
+    leased = []
+    for task_id in candidates:
+        claimed = ProbeTask.query.filter(ProbeTask.id == task_id, available).update({
+            'status': 'leased',
+            'agent_id': agent_id,
+            'lease_until': now + timedelta(seconds=lease_seconds),
+            'attempts': ProbeTask.attempts + 1,
+        }, synchronize_session=False)
+        if claimed:
+            leased.append(task_id)
+            if len(leased) == limit:
+                break
+    db.session.commit()
+
+    if not leased:
+        return []
+    return [
+        {
+            'id': task.id,
+            'url': task.url,
+            'expected_text': task.expected_text,
+            'validators': Validators(**json.loads(task.validators)) if task.validators else None,
+            'options': {'timeout': task.timeout or 30, 'breaker_timeout': task.breaker_timeout},
+        }
+        for task in ProbeTask.query.filter(ProbeTask.id.in_(leased))
+    ]
+
+def complete_task(task_id, agent_id, result):
+    # Only the current lease holder may report; a late agent's result is dropped
+    return ProbeTask.query.filter_by(id=task_id, agent_id=agent_id, status='leased').update({
+        'status': 'done',
+        'finished_at': datetime.now(),
+        'result': json.dumps(result_to_dict(result)),
+    }, synchronize_session=False)
+
+def run_agent(app, agent_id=None, batch_size=None, lease_seconds=120, poll_seconds=5, once=False):
+    """
+    Probe agent loop: lease due tasks, probe them concurrently (same probe
+    path, host limits and DNS cache as local mode) and report results.
+    Run as many agents as needed; throughput scales with their number.
+    """
+    agent_id = agent_id or f"{socket.gethostname()}:{os.getpid()}"
+    max_workers = app.config.get('MONITOR_MAX_WORKERS', 8)
+    batch_size = batch_size or max_workers * 2
+    probe_service.configure(app.config)
+    print(f"Probe agent {agent_id} started (batch={batch_size}, lease={lease_seconds}s)")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            with app.app_context():
+                tasks = lease_tasks(agent_id, batch_size, lease_seconds)
+
+            if not tasks:
+                if once:
+                    return
+                time.sleep(poll_seconds)
+                continue
+
+            futures = {
+                executor.submit(probe_site, task['url'], task['expected_text'], task['validators'],
+                                **task['options']): task['id']
+                for task in probe_service.interleave_by_host(tasks, lambda task: task['url'])
+            }
+            with app.app_context():
+                for future in as_completed(futures):
+                    if not complete_task(futures[future], agent_id, future.result()):
+                        print(f"Lease lost for task {futures[future]}; result discarded")
+                    db.session.commit()
+            print(f"Probe agent {agent_id}: {len(tasks)} site(s) checked")
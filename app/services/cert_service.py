@@ -0,0 +1,130 @@
+import socket
+import ssl
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+from ..extensions import db
+from ..models import Site, CertStatus, GlobalSettings
+from .notifier_service import notify, cert_notification
+from .probe_service import dns_cache
+
+# A host's certificate is looked at no more than once per day
+CACHE_TTL = timedelta(days=1)
+# A certificate about to expire is notified once, then again only after this long
+REMINDER_INTERVAL = timedelta(days=7)
+
+def cert_host_of(url):
+    # 'host:port' for https URLs, None otherwise
+    parts = urlsplit(url)
+    if parts.scheme != 'https' or not parts.hostname:
+        return None
+    try:
+        port = parts.port or 443
+    except ValueError:
+        return None
+    return f"{parts.hostname.lower()}:{port}"
+
+def scan_certificates(app, force=False):
+    """
+    Low-frequency job: one TLS handshake per distinct https host (across all
+    sites) whose cached result is older than a day, run concurrently.
+    Hosts expiring within cert_warning_days trigger a notification, once
+    per certificate and then every REMINDER_INTERVAL (0 days disables it).
+    """
+    with app.app_context():
+        settings = GlobalSettings.query.first()
+        if not settings:
+            return
+
+        sites_by_host = {}
+        for site in Site.query.all():
+            host = cert_host_of(site.url)
+            if host:
+                sites_by_host.setdefault(host, []).append(site)
+        if not sites_by_host:
+            return
+
+        now = datetime.now()
+        cached = {c.host: c for c in CertStatus.query.filter(CertStatus.host.in_(list(sites_by_host)))}
+        stale = [
+            host for host in sites_by_host
+            if force or host not in cached or now - cached[host].checked_at >= CACHE_TTL
+        ]
+        if not stale:
+            return
+
+        with ThreadPoolExecutor(max_workers=app.config.get('MONITOR_MAX_WORKERS', 8)) as executor:
+            results = dict(zip(stale, executor.map(_fetch_expiry, stale)))
+
+        warning_days = _warning_days(settings)
+        for host, (expires_at, error) in results.items():
+            status = cached.get(host)
+            if status is None:
+                status = CertStatus(host=host)
+                db.session.add(status)
+            if expires_at != status.expires_at:
+                # Renewed (or first seen): any earlier notice was about another certificate
+                status.notified_at = None
+            status.expires_at = expires_at
+            status.error_message = error
+            status.checked_at = now
+
+            expiring = warning_days and expires_at and expires_at - now <= timedelta(days=warning_days)
+            if expiring and (status.notified_at is None or now - status.notified_at >= REMINDER_INTERVAL):
+                notify(cert_notification(host, expires_at, sites_by_host[host]), settings)
+                status.notified_at = now
+
+        db.session.commit()
+        print(f"Certificate scan: {len(stale)} host(s) checked, {len(sites_by_host) - len(stale)} cached")
+
+def expiring_hosts(settings):
+    """
+    {host: days_left} for hosts whose cached certificate expires within
+    cert_warning_days (negative once already expired).
+    """
+    warning_days = _warning_days(settings)
+    if not warning_days:
+        return {}
+    now = datetime.now()
+    limit = now + timedelta(days=warning_days)
+    expiring = CertStatus.query.filter(CertStatus.expires_at.isnot(None), CertStatus.expires_at <= limit)
+    return {status.host: (status.expires_at - now).days for status in expiring}
+
+def _warning_days(settings):
+    # 0 disables certificate warnings; only an unset value means the default
+    return 14 if settings.cert_warning_days is None else settings.cert_warning_days
+
+def _fetch_expiry(host_port):
+    # Returns (expires_at, error_message). Never raises.
+    host, port = host_port.rsplit(':', 1)
+    try:
+        address = dns_cache.resolve(host, int(port))[0]
+        error = None
+        try:
+            der = _handshake(host, address, int(port), verify=True)
+        except ssl.SSLCertVerificationError as e:
+            # Still read the expiry date of an invalid (e.g. already expired) certificate
+            error = f"Certificado inválido: {e.verify_message}"
+            der = _handshake(host, address, int(port), verify=False)
+
+        from cryptography import x509 # Heavy; only the monitor process scans certificates
+
+        cert = x509.load_der_x509_certificate(der)
+        if hasattr(cert, 'not_valid_after_utc'):
+            not_after = cert.not_valid_after_utc
+        else:
+            # cryptography < 42 (only pulled in by Authlib, not pinned): naive UTC
+            not_after = cert.not_valid_after.replace(tzinfo=timezone.utc)
+        # Stored like every other timestamp in the app: naive local time
+        return not_after.astimezone().replace(tzinfo=None), error
+    except Exception as e:
+        return None, f"Falha ao verificar certificado: {str(e)}"[:500]
+
+def _handshake(host, address, port, verify):
+    context = ssl.create_default_context()
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    with socket.create_connection((address, port), timeout=10) as sock:
+        with context.wrap_socket(sock, server_hostname=host) as tls:
+            return tls.getpeercert(binary_form=True)
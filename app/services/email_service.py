@@ -1,83 +1,34 @@
 import smtplib
 from email.message import EmailMessage
-from datetime import datetime
 from ..models import User
 
-def send_alert_email(site, settings):
-    if not (settings.email_user and settings.email_password):
-        print("Email configuration (User/Pass) missing in Settings. Notification skipped.")
-        return
-
-    # Fetch users who want notifications
+def notification_recipients():
+    # Users who opted in to monitoring notifications
     users_to_notify = User.query.filter_by(receive_notifications=True).all()
-    recipients = [u.email for u in users_to_notify if u.email]
-    
-    if not recipients:
-        print("No users configured to receive notifications.")
-        return
+    return [u.email for u in users_to_notify if u.email]
 
+def send_notification_email(subject, text, settings, recipient, timeout=60):
+    """
+    Sends one monitoring notification (see notifier_service). Unlike the
+    account emails below, errors are raised so the caller can retry.
+    """
     try:
         smtp_port = int(settings.smtp_port) if settings.smtp_port else 465
     except ValueError:
         smtp_port = 465
 
-    for recipient in recipients:
-        msg = EmailMessage()
-        msg['Subject'] = f"ALERT: {site.name} is OFFLINE"
-        msg = EmailMessage()
-        msg['Subject'] = f"ALERTA: {site.name} está OFFLINE"
-        
-        sender = settings.email_user
-        if sender and '@' not in sender:
-             if 'ime.usp.br' in settings.smtp_server:
-                 sender = f"{sender}@ime.usp.br"
-        
-        msg['From'] = f"Monitor de Sites <{sender}>"
-        msg['To'] = recipient
-        msg.set_content(f"O site {site.name} ({site.url}) está inacessível há mais de {settings.alert_threshold} minutos.\n\nHorário: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\nErro: {site.error_message}")
-
-        try:
-            _send_email(msg, settings, smtp_port)
-            print(f"Sent alert email for {site.name} to {recipient}")
-        except Exception as e:
-            print(f"Failed to send email to {recipient}: {e}")
-
-def send_recovery_email(site, settings):
-    if not (settings.email_user and settings.email_password):
-        return
-
-    # Fetch users who want notifications
-    users_to_notify = User.query.filter_by(receive_notifications=True).all()
-    recipients = [u.email for u in users_to_notify if u.email]
-
-    if not recipients:
-        return
-
-    try:
-        smtp_port = int(settings.smtp_port) if settings.smtp_port else 465
-    except ValueError:
-        smtp_port = 465
+    msg = EmailMessage()
+    msg['Subject'] = subject
 
-    for recipient in recipients:
-        msg = EmailMessage()
-        msg['Subject'] = f"RECOVERY: {site.name} is BACK ONLINE"
-        msg = EmailMessage()
-        msg['Subject'] = f"RECUPERAÇÃO: {site.name} está ONLINE novamente"
-        
-        sender = settings.email_user
-        if sender and '@' not in sender:
-             if settings.smtp_server and 'ime.usp.br' in settings.smtp_server:
-                 sender = f"{sender}@ime.usp.br"
-        
-        msg['From'] = f"Monitor de Sites <{sender}>"
-        msg['To'] = recipient
-        msg.set_content(f"O site {site.name} ({site.url}) voltou a responder.\n\nHorário: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    sender = settings.email_user
+    if sender and '@' not in sender:
+         if settings.smtp_server and 'ime.usp.br' in settings.smtp_server:
+             sender = f"{sender}@ime.usp.br"
 
-        try:
-            _send_email(msg, settings, smtp_port)
-            print(f"Sent recovery email for {site.name} to {recipient}")
-        except Exception as e:
-            print(f"Failed to send recovery email to {recipient}: {e}")
+    msg['From'] = f"Monitor de Sites <{sender}>"
+    msg['To'] = recipient
+    msg.set_content(text)
+    _send_email(msg, settings, smtp_port, timeout=timeout)
 
 def send_new_user_admin_notification(new_user, admins, settings):
     """
@@ -201,13 +152,13 @@ def send_role_update_email(user, new_role, settings):
     except Exception as e:
         print(f"Failed to send role update email to {user.email}: {e}")
 
-def _send_email(msg, settings, port):
+def _send_email(msg, settings, port, timeout=60):
     if port == 465:
-        with smtplib.SMTP_SSL(settings.smtp_server, port) as smtp:
+        with smtplib.SMTP_SSL(settings.smtp_server, port, timeout=timeout) as smtp:
             smtp.login(settings.email_user, settings.email_password)
             smtp.send_message(msg)
     else:
-        with smtplib.SMTP(settings.smtp_server, port) as smtp:
+        with smtplib.SMTP(settings.smtp_server, port, timeout=timeout) as smtp:
             smtp.starttls()
             smtp.login(settings.email_user, settings.email_password)
             smtp.send_message(msg)
@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+from markupsafe import Markup
+from sqlalchemy import func
+from ..extensions import db
+
+class FragmentCache:
+    """
+    LRU cache of rendered template fragments. Keys embed the data version
+    they were rendered from, so a fragment is reused until its rows change
+    and old versions simply age out.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        # Rendered outside the lock; two threads racing on a miss may both render it
+        html = Markup(render())
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+fragments = FragmentCache()
+
+def data_version(*models):
+    """
+    Cheap version of the given tables: (row count, latest updated_at) each.
+    Any insert, update or delete changes it, whichever process made it.
+    """
+    version = ()
+    for model in models:
+        version += tuple(db.session.query(func.count(model.id), func.max(model.updated_at)).one())
+    return version
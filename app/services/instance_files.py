@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+from flask import current_app
+
+# Small files under instance/ shared between processes (web workers, the
+# monitor). Writes are atomic so readers never see a half-written file.
+
+# mkstemp creates files as 0600; written files are made world-readable so
+# e.g. a front proxy can serve the static status page
+FILE_MODE = 0o644
+
+def instance_file(*parts):
+    return os.path.join(current_app.instance_path, *parts)
+
+def write_atomic(path, data):
+    # data: str or bytes
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+def write_json(path, data):
+    write_atomic(path, json.dumps(data, default=str))
+
+def read_json(path):
+    # None when missing or unreadable
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
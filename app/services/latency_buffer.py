@@ -0,0 +1,173 @@
+import math
+import os
+import statistics
+import threading
+import time
+from array import array
+from .instance_files import instance_file, read_json, write_json
+from .stats_service import percentile
+
+SNAPSHOT_FILE = 'latency_snapshot.json'
+
+class LatencyRing:
+    """
+    Last `size` probes of one site in two flat arrays (float32 latency in ms,
+    int8 outcome): 5 bytes per probe, allocated once, O(1) append.
+    """
+
+    __slots__ = ('size', '_latency', '_ok', '_next', '_count')
+
+    def __init__(self, size):
+        self.size = size
+        self._latency = array('f', [math.nan]) * size
+        self._ok = array('b', [0]) * size
+        self._next = 0
+        self._count = 0
+
+    def append(self, latency_ms, ok):
+        # Failed probes keep no latency: a refused connection is fast and would skew the baseline
+        self._latency[self._next] = latency_ms if ok and latency_ms is not None else math.nan
+        self._ok[self._next] = 1 if ok else 0
+        self._next = (self._next + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def __len__(self):
+        return self._count
+
+    def _ordered(self, values):
+        # Oldest first
+        if self._count < self.size:
+            return values[:self._count]
+        return values[self._next:] + values[:self._next]
+
+    def latencies(self):
+        return [None if math.isnan(v) else round(v) for v in self._ordered(self._latency)]
+
+    def outcomes(self):
+        return self._ordered(self._ok).tolist()
+
+    def stats(self):
+        # p50/p95/p99 of the recorded latencies and share of successful probes
+        if not self._count:
+            return {'p50': None, 'p95': None, 'p99': None, 'uptime': None, 'count': 0}
+
+        latency = sorted(v for v in self._latency if not math.isnan(v))
+        uptime = sum(self._ok[:self._count]) / self._count
+        p50, p95, p99 = (round(percentile(latency, q)) if latency else None for q in (50, 95, 99))
+
+        return {'p50': p50, 'p95': p95, 'p99': p99, 'uptime': round(uptime * 100, 1), 'count': self._count}
+
+    def latency_anomaly(self, recent=3, min_baseline=10):
+        """
+        Compares the median of the last `recent` latencies with the earlier
+        samples in the buffer (the baseline) using a robust z-score:
+        (recent median - baseline median) / (1.4826 * baseline MAD).
+        Returns (recent_median, baseline_median, z); the last two are None
+        while there are fewer than `min_baseline` baseline samples, and the
+        whole result is None without any recent latency.
+        """
+        ordered = self._ordered(self._latency)
+        samples = [v for v in ordered[-recent:] if not math.isnan(v)]
+        baseline = [v for v in ordered[:-recent] if not math.isnan(v)]
+        if not samples:
+            return None
+        recent_median = statistics.median(samples)
+        if len(baseline) < min_baseline:
+            return round(recent_median), None, None
+        baseline_median = statistics.median(baseline)
+        mad = statistics.median(abs(v - baseline_median) for v in baseline)
+
+        # A perfectly flat baseline has MAD 0; 1 ms keeps z finite
+        z = (recent_median - baseline_median) / (1.4826 * max(mad, 1.0))
+        return round(recent_median), round(baseline_median), z
+
+class LatencyBuffers:
+    """
+    One LatencyRing per site, kept by the monitor process. Memory is fixed
+    per site (size * 5 bytes of samples), so it stays predictable at
+    thousands of sites.
+    """
+
+    def __init__(self, size=60):
+        self.size = size
+        self._lock = threading.Lock()
+        self._rings = {}
+
+    def record(self, site_id, latency_ms, ok):
+        with self._lock:
+            ring = self._rings.get(site_id)
+            if ring is None or ring.size != self.size:
+                ring = self._rings[site_id] = LatencyRing(self.size)
+            ring.append(latency_ms, ok)
+
+    def stats(self, site_id):
+        with self._lock:
+            ring = self._rings.get(site_id)
+        return ring.stats() if ring else None
+
+    def latency_anomaly(self, site_id, **kwargs):
+        with self._lock:
+            ring = self._rings.get(site_id)
+        return ring.latency_anomaly(**kwargs) if ring else None
+
+    def retain(self, site_ids):
+        # Drops rings of deleted sites
+        with self._lock:
+            for site_id in set(self._rings) - set(site_ids):
+                del self._rings[site_id]
+
+    def snapshot(self):
+        """
+        {site_id: {'latencies': [ms or None, ...], 'ok': [1/0, ...], 'p50', 'p95', 'p99', 'uptime', 'count'}}
+        oldest sample first.
+        """
+        with self._lock:
+            rings = list(self._rings.items())
+        return {
+            site_id: {'latencies': ring.latencies(), 'ok': ring.outcomes(), **ring.stats()}
+            for site_id, ring in rings
+        }
+
+latency_buffers = LatencyBuffers()
+
+# --- Sharing with web workers ---
+# The monitor usually runs in its own process, so it publishes the snapshot
+# to instance/ after each run and the dashboard reads it from there.
+
+_file_cache = (None, None) # (mtime, snapshot)
+
+def publish_snapshot():
+    snapshot = latency_buffers.snapshot()
+    write_json(instance_file(SNAPSHOT_FILE), {'version': time.time(), 'sites': snapshot})
+
+def load_snapshot():
+    """
+    Latest published snapshot: {'version': float, 'sites': {site_id: {...}}}.
+    Parsed again only when the file changes.
+    """
+    global _file_cache
+    path = instance_file(SNAPSHOT_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {'version': None, 'sites': {}}
+
+    cached_mtime, snapshot = _file_cache
+    if cached_mtime != mtime:
+        data = read_json(path) or {'version': None, 'sites': {}}
+        # JSON object keys are strings
+        snapshot = {'version': data['version'], 'sites': {int(k): v for k, v in data['sites'].items()}}
+        _file_cache = (mtime, snapshot)
+    return snapshot
+
+def sparkline_points(latencies, width=120, height=24):
+    # SVG polyline points for a latency series; gaps (failed probes) are skipped
+    values = [v for v in latencies if v is not None]
+    if len(values) < 2:
+        return ''
+    top = max(values) or 1
+    step = width / (len(latencies) - 1)
+    return ' '.join(
+        f"{i * step:.1f},{height - (v / top) * (height - 2) - 1:.1f}"
+        for i, v in enumerate(latencies) if v is not None
+    )
@@ -1,117 +1,537 @@
-import requests
-from datetime import datetime
-from ..extensions import db
-from ..models import Site, SiteHistory, GlobalSettings
-from .email_service import send_alert_email, send_recovery_email
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from ..extensions import db, scheduler
+from ..models import SiteHistory, GlobalSettings, MonitorJob, SiteCheck
+from .notifier_service import notify, site_notification
+from . import status_page, probe_service, agent_service, profiler
+from .cert_service import cert_host_of, expiring_hosts
+from .probe_service import probe_site, Validators
+from .latency_buffer import latency_buffers, publish_snapshot
+from .state_machine import (get_check_interval, transition, unreachable, dependency_down, dependency_failing,
+                            ALERT, RECOVERY, DEGRADED, FLAPPING)
+from .write_behind import write_behind
+from .site_rows import load_rows, save_rows
 
-def check_sites(app, force=False):
+# Ticks, forced/on-demand runs and agent result collection run on the
+# scheduler's thread pool. One at a time per process: each works from its own
+# load_rows() snapshot, so overlapping runs would probe the same sites twice,
+# notify the same transition twice and overwrite each other's save_rows()
+_checks_lock = threading.Lock()
+# Held by the run_pending_jobs instance working through the queue
+_pending_lock = threading.Lock()
+
+def check_sites(app, force=False, job_id=None):
     # print("Tick...") 
-    with app.app_context():
+    with app.app_context(), _checks_lock, profiler.profiled_tick():
         settings = GlobalSettings.query.first()
         if not settings:
             return
 
-        # Determine current interval (Weekday vs Weekend)
+        if _uses_agents(app):
+            # Apply what agents reported first, so last_checked is current
+            _collect_probe_results(settings)
+
         # Weekday: 0-4 (Mon-Fri), Weekend: 5-6 (Sat-Sun)
         is_weekend = datetime.now().weekday() >= 5
-        current_interval_minutes = settings.interval_weekend if is_weekend else settings.interval_weekday
-        threshold_seconds = settings.alert_threshold * 60
 
-        sites = Site.query.all()
+        sites = load_rows()
+        write_behind.overlay(sites)
+        latency_buffers.retain(site.id for site in sites)
+
+        due_sites = []
         for site in sites:
             # Check if it is time to check this site (unless forced)
             if not force and site.last_checked:
                 time_since_check = datetime.now() - site.last_checked
-                if time_since_check.total_seconds() < (current_interval_minutes * 60):
+                if time_since_check.total_seconds() < (get_check_interval(site, settings, is_weekend) * 60):
                     continue # Skip, not time yet
+            due_sites.append(site)
+
+        if job_id:
+            _update_job(job_id, total=len(due_sites), done=0)
+
+        _run_checks(app, due_sites, settings, job_id=job_id)
+
+def check_site_ids(app, site_ids, job_id=None):
+    """
+    Checks the given sites right away (ignoring their intervals), e.g. after
+    they were added, edited or imported.
+    """
+    with app.app_context(), _checks_lock:
+        settings = GlobalSettings.query.first()
+        sites = load_rows(site_ids)
+        if job_id:
+            _update_job(job_id, total=len(sites), done=0)
+        if not settings or not sites:
+            return
+
+        _run_checks(app, sites, settings, job_id=job_id)
 
-            # --- Perform Check ---
-            print(f"Checking {site.name}...")
-            previous_status = site.status
-            try:
-                response = requests.get(site.url, timeout=30)
-                is_success = False
-                
-                if response.status_code == 200:
-                    if site.expected_text:
-                        if site.expected_text in response.text:
-                            is_success = True
-                        else:
-                            is_success = False
-                            error_msg = f"Texto esperado '{site.expected_text}' não encontrado."
-                    else:
-                        is_success = True
-                else:
-                    is_success = False
-                    error_msg = f"Status Code: {response.status_code}"
-
-                if is_success:
-                    # Success State
-                    if site.status == 'offline':
-                        send_recovery_email(site, settings)
-                        
-                        # Close History
-                        history_entry = SiteHistory.query.filter_by(site_id=site.id, end_time=None).first()
-                        if history_entry:
-                            history_entry.end_time = datetime.now()
-                    
-                    site.status = 'online'
-                    site.first_failure_time = None
-                    site.error_message = None
-                else:
-                    # Failure State
-                    site.error_message = error_msg
-                    
-                    if site.first_failure_time is None:
-                        # First failure detected
-                        site.first_failure_time = datetime.now()
-                        site.status = 'warning'
-                    else:
-                        # Successive failure
-                        time_diff = datetime.now() - site.first_failure_time
-                        if time_diff.total_seconds() >= threshold_seconds:
-                            site.status = 'offline'
-                            
-                            # Send Alert only if transitioning to offline for the first time
-                            if previous_status != 'offline':
-                                send_alert_email(site, settings)
-                                
-                                # Open History
-                                new_history = SiteHistory(
-                                    site_id=site.id, 
-                                    site_name=site.name,
-                                    status='offline', 
-                                    start_time=datetime.now(), 
-                                    error_message=site.error_message
-                                )
-                                db.session.add(new_history)
-                        else:
-                            site.status = 'warning'
-
-            except Exception as e:
-                # Exception Handling
-                site.error_message = f"Connection Error: {str(e)}"
-                if site.first_failure_time is None:
-                    site.first_failure_time = datetime.now()
-                    site.status = 'warning'
-                else:
-                    time_diff = datetime.now() - site.first_failure_time
-                    if time_diff.total_seconds() >= threshold_seconds:
-                        previous_status = site.status
-                        site.status = 'offline'
-                        if previous_status != 'offline':
-                            send_alert_email(site, settings)
-                            new_history = SiteHistory(
-                                site_id=site.id, 
-                                site_name=site.name, 
-                                status='offline', 
-                                start_time=datetime.now(), 
-                                error_message=site.error_message
-                            )
-                            db.session.add(new_history)
-                    else:
-                        site.status = 'warning'
-            
-            site.last_checked = datetime.now()
-            
+def check_site(app, site_id):
+    check_site_ids(app, [site_id])
+
+def schedule_site_check(app, site_id):
+    # Runs in the background so the caller (usually a web request) returns instantly
+    return schedule_sites_check(app, [site_id])
+
+def schedule_sites_check(app, site_ids):
+    """
+    Queues one background run probing all of the given sites concurrently.
+    Re-saving the same sites before the run starts reuses the queued job.
+    """
+    key = ','.join(str(site_id) for site_id in sorted(site_ids))
+    job = MonitorJob.query.filter_by(kind='sites', status='queued', site_ids=key).first()
+    if job:
+        return job
+
+    job = MonitorJob(id=uuid.uuid4().hex, kind='sites', site_ids=key, status='queued', created_at=datetime.now())
+    db.session.add(job)
+    db.session.commit()
+    _dispatch_job(app, job.id)
+    return job
+
+def _uses_agents(app):
+    return app.config.get('MONITOR_PROBE_MODE', 'local') == 'agents'
+
+def _run_checks(app, sites, settings, job_id=None):
+    """
+    Probes the sites concurrently and applies each result as it arrives.
+    Probes only touch the network; all ORM work stays on this thread.
+    In agents mode the sites are queued for probe agents instead, and the
+    results are applied later by collect_probe_results().
+    """
+    if _uses_agents(app):
+        to_probe = _skip_unreachable(sites, settings)
+        queued = agent_service.enqueue_probe_tasks(to_probe, job_id=job_id,
+                                                   options_of=lambda site: _probe_options(site, app.config, settings))
+        save_rows(sites)
         db.session.commit()
+        if job_id:
+            _update_job(job_id, total=queued)
+        print(f"Queued {queued} site(s) for probe agents")
+        _publish_status_page()
+        return
+
+    threshold_seconds = settings.alert_threshold * 60
+    max_workers = app.config.get('MONITOR_MAX_WORKERS', 8)
+    targets = {site.id: site for site in sites}
+
+    probe_service.configure(app.config)
+    probe_service.dns_cache.reset_stats()
+    latency_buffers.size = app.config.get('MONITOR_LATENCY_SAMPLES', 60)
+    cert_days_left = expiring_hosts(settings)
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Parents first, so their children see this run's result
+        for level in _dependency_levels(sites):
+            to_probe = _skip_unreachable(level, settings)
+            done += len(level) - len(to_probe)
+            futures = {
+                executor.submit(probe_site, site.url, site.expected_text, _validators_of(site),
+                                **_probe_options(site, app.config, settings)): site.id
+                for site in probe_service.interleave_by_host(to_probe, lambda site: site.url)
+            }
+            for future in as_completed(futures):
+                site = targets[futures[future]]
+                _record_result(site, future.result(), settings, threshold_seconds, cert_days_left)
+
+                done += 1
+                if job_id:
+                    # Also commits this site's result, so a killed run keeps its progress
+                    save_rows([site])
+                    _update_job(job_id, done=done)
+
+    save_rows(sites)
+    db.session.commit()
+    # Someone is waiting on an on-demand run: show its results right away
+    _flush_write_behind(force=bool(job_id))
+
+    dns_stats = probe_service.dns_cache.stats()
+    print(f"DNS cache: {dns_stats['hits']} hits, {dns_stats['misses']} misses ({dns_stats['entries']} hosts)")
+
+    _publish_latency_snapshot()
+    _publish_status_page()
+    _prune_site_checks(app.config.get('MONITOR_TIMING_RETENTION_DAYS', 7))
+
+def _dependency_levels(sites):
+    """
+    Splits sites into batches: those whose parent is not among them first,
+    then their children, and so on.
+    """
+    batch = {site.id: site for site in sites}
+    depths = {}
+
+    def depth(site, seen=()):
+        if site.id not in depths:
+            parent = batch.get(site.parent_id)
+            # A cycle (should not be saved, but never loop on one) ends the chain
+            depths[site.id] = 0 if parent is None or parent.id in seen else depth(parent, seen + (site.id,)) + 1
+        return depths[site.id]
+
+    levels = {}
+    for site in sites:
+        levels.setdefault(depth(site), []).append(site)
+    return [levels[level] for level in sorted(levels)]
+
+def _skip_unreachable(sites, settings):
+    """
+    Marks sites whose dependency is down as unreachable instead of probing
+    them, and returns the ones left to probe.
+    """
+    to_probe = []
+    for site in sites:
+        if dependency_down(site.parent):
+            print(f"Skipping {site.name}: depends on {site.parent.name} ({site.parent.status})")
+            _apply_change(site, unreachable(site, site.parent.name), settings, datetime.now())
+        else:
+            to_probe.append(site)
+    return to_probe
+
+# Seconds a probe is still waited on past the degraded latency limit, so a
+# slow response is reported as degraded rather than timing out as offline
+DEGRADED_TIMEOUT_MARGIN = 5
+
+def _probe_options(site, config, settings):
+    """
+    Per-site probe_site() timeouts. Responding sites get an adaptive timeout
+    of p99 * factor of their recent latency, so a site that normally answers
+    in 300 ms is not waited on for 30 s. The timeout never drops to the
+    degraded latency limit (degraded_latency_ms), or slowness would alert as
+    offline. Offline sites get the circuit breaker: a short TCP check, and
+    the full request (with the regular ceiling) only once the host accepts
+    connections again.
+    """
+    floor = config.get('MONITOR_TIMEOUT_MIN', 10)
+    if settings.degraded_latency_ms:
+        floor = max(floor, settings.degraded_latency_ms / 1000 + DEGRADED_TIMEOUT_MARGIN)
+    ceiling = max(config.get('MONITOR_TIMEOUT_MAX', 30), floor)
+    if site.status == 'offline':
+        return {'timeout': ceiling, 'breaker_timeout': config.get('MONITOR_BREAKER_TIMEOUT', 5)}
+
+    stats = latency_buffers.stats(site.id)
+    if not stats or stats['count'] < 10 or stats['p99'] is None:
+        return {'timeout': ceiling}
+    timeout = stats['p99'] / 1000 * config.get('MONITOR_TIMEOUT_FACTOR', 4)
+    return {'timeout': min(max(timeout, floor), ceiling)}
+
+def _record_result(site, result, settings, threshold_seconds, cert_days_left):
+    print(f"Checking {site.name}..." + (" (not modified)" if result.not_modified else ""))
+    _remember_validators(site, result)
+    # Recorded first so this probe counts towards the latency check
+    latency_buffers.record(site.id, (result.timings or {}).get('total'), result.ok)
+    if dependency_failing(site.parent):
+        # Hold off on alerting until the parent is confirmed down (or back)
+        threshold_seconds = float('inf')
+    _apply_result(site, result, settings, threshold_seconds,
+                  cert_days_left=cert_days_left.get(cert_host_of(site.url)),
+                  latency_alert=_latency_alert(site, settings) if result.ok else None)
+    write_behind.add_check(_site_check(site, result))
+
+# A slow-down must also be at least this many times the usual latency, so
+# jitter on very fast sites (20 ms -> 60 ms) never counts as degraded
+DEGRADED_MIN_RATIO = 1.5
+
+def _latency_alert(site, settings):
+    """
+    Describes abnormal latency in the site's recent probes, or returns None.
+    A degraded site only recovers once its z-score falls below half the
+    sensitivity, so it does not flap around the threshold.
+    """
+    anomaly = latency_buffers.latency_anomaly(site.id)
+    if anomaly is None:
+        return None
+    recent_ms, usual_ms, z = anomaly
+
+    limit_ms = settings.degraded_latency_ms
+    if limit_ms and recent_ms >= limit_ms:
+        return f"Lentidão: resposta em {recent_ms} ms (limite {limit_ms} ms)."
+
+    sensitivity = settings.degraded_sensitivity
+    if not sensitivity or z is None:
+        return None
+    if site.status == 'degraded':
+        sensitivity /= 2
+    if z >= sensitivity and recent_ms >= usual_ms * DEGRADED_MIN_RATIO:
+        return f"Lentidão: resposta em {recent_ms} ms (habitual {usual_ms} ms)."
+    return None
+
+def _publish_latency_snapshot():
+    # Lets web workers draw recent latency without querying SiteCheck
+    try:
+        publish_snapshot()
+    except OSError as e:
+        print(f"Could not publish latency snapshot: {e}")
+
+def _publish_status_page():
+    # Static public page, rewritten when a status changes (see status_page)
+    try:
+        sites = load_rows()
+        write_behind.overlay(sites)
+        if status_page.publish(sites, current_app.config.get('MONITOR_FLUSH_INTERVAL', 300)):
+            print("Published status page")
+    except OSError as e:
+        print(f"Could not publish status page: {e}")
+
+def collect_probe_results(app):
+    # Agents mode: apply results reported by probe agents (also run every tick)
+    with app.app_context(), _checks_lock:
+        settings = GlobalSettings.query.first()
+        if settings:
+            _collect_probe_results(settings)
+
+def _collect_probe_results(settings):
+    finished = agent_service.take_finished_tasks()
+    if not finished:
+        db.session.commit()
+        return
+
+    sites = {site.id: site for site in load_rows({f[0] for f in finished})}
+    cert_days_left = expiring_hosts(settings)
+    threshold_seconds = settings.alert_threshold * 60
+
+    job_progress = {}
+    for site_id, job_id, result in finished:
+        site = sites.get(site_id)
+        if site is None:
+            continue # Deleted while being probed
+        # The central state machine stays authoritative for every result
+        _record_result(site, result, settings, threshold_seconds, cert_days_left)
+        if job_id:
+            job_progress[job_id] = job_progress.get(job_id, 0) + 1
+    save_rows(sites.values())
+    db.session.commit()
+    _flush_write_behind(force=bool(job_progress))
+    _publish_latency_snapshot()
+    _publish_status_page()
+
+    for job_id, count in job_progress.items():
+        _update_job(job_id, done=MonitorJob.done + count)
+        job = MonitorJob.query.get(job_id)
+        if job and job.status == 'running' and job.done >= job.total:
+            _update_job(job_id, status='done', finished_at=datetime.now())
+
+def _site_check(site, result):
+    # SiteCheck columns, inserted in bulk by the next write-behind flush
+    timings = result.timings or {}
+    return {
+        'site_id': site.id,
+        'checked_at': site.last_checked,
+        'ok': result.ok,
+        'dns_ms': timings.get('dns'),
+        'connect_ms': timings.get('connect'),
+        'tls_ms': timings.get('tls'),
+        'ttfb_ms': timings.get('ttfb'),
+        'transfer_ms': timings.get('transfer'),
+        'total_ms': timings.get('total'),
+    }
+
+def _flush_write_behind(force=False):
+    # Batched last_checked and SiteCheck writes (see write_behind)
+    try:
+        if force or not write_behind.enabled:
+            write_behind.flush()
+        else:
+            write_behind.flush_if_due(current_app.config.get('MONITOR_FLUSH_INTERVAL', 300))
+    except SQLAlchemyError as e:
+        print(f"Could not flush pending check data: {e}")
+
+_last_prune = None
+
+def _prune_site_checks(retention_days):
+    # At most once an hour: drop probe timings past the retention window
+    global _last_prune
+    if _last_prune and datetime.now() - _last_prune < timedelta(hours=1):
+        return
+    _last_prune = datetime.now()
+
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    SiteCheck.query.filter(SiteCheck.checked_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+
+def _validators_of(site):
+    return Validators(
+        etag=site.etag,
+        last_modified=site.last_modified,
+        content_hash=site.content_hash,
+        text_match=site.text_match,
+    )
+
+def _remember_validators(site, result):
+    if result.validators is None:
+        return
+    site.etag = result.validators.etag
+    site.last_modified = result.validators.last_modified
+    site.content_hash = result.validators.content_hash
+    site.text_match = result.validators.text_match
+
+def clear_validators(site):
+    # The cached verdict only holds for the URL/expected_text it was computed for
+    site.etag = site.last_modified = site.content_hash = None
+    site.text_match = None
+
+def _apply_result(site, result, settings, threshold_seconds, cert_days_left=None, latency_alert=None):
+    """
+    Moves a site to its next state (see state_machine.transition) given a
+    probe result, queueing alert/recovery notifications and opening/closing
+    history.
+    `site` is a site_rows.SiteRow. The caller owns the app context and
+    writes the rows back (save_rows) before committing. Transitions are
+    persisted with that commit; an unchanged site only gets its check time
+    queued in write_behind.
+    """
+    now = datetime.now()
+    change = transition(site, result.ok, now, threshold_seconds, error_message=result.error_message,
+                        cert_days_left=cert_days_left, latency_alert=latency_alert,
+                        flap_window_seconds=(settings.flap_window or 0) * 60, flap_threshold=settings.flap_threshold or 0)
+    _apply_change(site, change, settings, now)
+
+def _apply_change(site, change, settings, now):
+    # Stores a state_machine.Transition on the site and carries out its events
+    site.status = change.status
+    site.first_failure_time = change.first_failure_time
+    site.breaker_failures = change.breaker_failures
+    site.error_message = change.error_message
+    site.recent_transitions = change.recent_transitions
+    open_history = None
+    if change.events:
+        open_history = SiteHistory.query.filter_by(site_id=site.id, end_time=None).first()
+
+    if RECOVERY in change.events:
+        notify(site_notification(RECOVERY, site, settings), settings)
+
+        # Close History
+        if open_history:
+            open_history.end_time = now
+
+    if ALERT in change.events or FLAPPING in change.events:
+        event = ALERT if ALERT in change.events else FLAPPING
+        notify(site_notification(event, site, settings), settings)
+
+        # Open History (a flapping site keeps one incident for all its bounces)
+        if open_history is None:
+            open_history = SiteHistory(
+                site_id=site.id, 
+                site_name=site.name,
+                status='offline', 
+                start_time=now, 
+                error_message=site.error_message
+            )
+            db.session.add(open_history)
+        if event == FLAPPING:
+            open_history.status = 'flapping'
+            open_history.error_message = site.error_message
+
+    if DEGRADED in change.events:
+        notify(site_notification(DEGRADED, site, settings), settings)
+
+    if change.events or site.changes() or not write_behind.enabled:
+        # The row is written now anyway (or nothing is batched); last_checked goes along
+        site.last_checked = now
+        write_behind.discard(site.id)
+    else:
+        # Nothing but the check time changed: batched by write_behind
+        write_behind.touch(site, now)
+
+# --- On-demand runs ---
+
+# A running job not updated for this long is assumed dead (e.g. worker recycled)
+STALE_JOB_AFTER = timedelta(minutes=10)
+
+def enqueue_forced_check(app):
+    """
+    Queues a forced check of every site on the monitoring scheduler and returns
+    (job, created). If a forced run is already queued or running, that job is
+    returned instead of starting a duplicate.
+    """
+    active = MonitorJob.query.filter(
+        MonitorJob.kind == 'force',
+        MonitorJob.status.in_(['queued', 'running'])
+    ).order_by(MonitorJob.created_at.desc()).first()
+
+    if active:
+        last_seen = active.updated_at or active.started_at or active.created_at
+        if datetime.now() - last_seen < STALE_JOB_AFTER:
+            return active, False
+        active.status = 'failed'
+        active.finished_at = datetime.now()
+        active.error_message = 'Execução interrompida.'
+
+    job = MonitorJob(id=uuid.uuid4().hex, kind='force', status='queued', created_at=datetime.now())
+    db.session.add(job)
+    db.session.commit()
+
+    _dispatch_job(app, job.id)
+    return job, True
+
+def _dispatch_job(app, job_id):
+    # Run right away if this process owns a scheduler; otherwise the monitor
+    # process (flask monitor run) picks it up via run_pending_jobs()
+    if scheduler.running:
+        scheduler.add_job(func=run_job, args=[app, job_id], id=f"job-{job_id}", misfire_grace_time=None)
+
+def run_pending_jobs(app):
+    # Polled every 5 s while a forced run may take minutes: later polls leave
+    # the queue to the instance already working through it
+    if not _pending_lock.acquire(blocking=False):
+        return
+    try:
+        with app.app_context():
+            pending = [job_id for (job_id,) in db.session.query(MonitorJob.id)
+                       .filter_by(status='queued').order_by(MonitorJob.created_at)]
+        for job_id in pending:
+            run_job(app, job_id)
+    finally:
+        _pending_lock.release()
+
+def run_job(app, job_id):
+    with app.app_context():
+        # Claim the job atomically so it never runs twice
+        claimed = MonitorJob.query.filter_by(id=job_id, status='queued').update(
+            {'status': 'running', 'started_at': datetime.now(), 'updated_at': datetime.now()}
+        )
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = MonitorJob.query.get(job_id)
+        try:
+            if job.kind == 'sites':
+                check_site_ids(app, [int(site_id) for site_id in job.site_ids.split(',')], job_id=job_id)
+            else:
+                check_sites(app, force=True, job_id=job_id)
+            # With agents the job finishes once their results are collected. The run
+            # committed `total` from its own session: read it fresh, not from `job`
+            total = db.session.query(MonitorJob.total).filter_by(id=job_id).scalar()
+            if not _uses_agents(app) or not total:
+                _update_job(job_id, status='done', finished_at=datetime.now())
+        except Exception as e:
+            db.session.rollback()
+            print(f"Monitor job {job_id} failed: {e}")
+            _update_job(job_id, status='failed', finished_at=datetime.now(), error_message=str(e)[:500])
+
+def register_jobs(target_scheduler, app):
+    # Periodic monitoring jobs, shared by the in-app scheduler and `flask monitor run`
+    from .cert_service import scan_certificates
+
+    target_scheduler.add_job(func=check_sites, args=[app], trigger="interval", minutes=1, id='check_sites')
+    # On-demand runs queued by web workers that have no scheduler of their own
+    # (a second instance may start, and returns at once, while one runs a long job)
+    target_scheduler.add_job(func=run_pending_jobs, args=[app], trigger="interval", seconds=5,
+                             max_instances=2, coalesce=True, id='run_pending_jobs')
+    # Hourly, but each host's certificate is only re-read once a day
+    target_scheduler.add_job(func=scan_certificates, args=[app], trigger="interval", hours=1,
+                             next_run_time=datetime.now() + timedelta(minutes=1), id='scan_certificates')
+    if _uses_agents(app):
+        # Pick up agent results between ticks (keeps forced-run progress live)
+        target_scheduler.add_job(func=collect_probe_results, args=[app], trigger="interval", seconds=10,
+                                 id='collect_probe_results')
+
+def _update_job(job_id, **fields):
+    fields['updated_at'] = datetime.now()
+    MonitorJob.query.filter_by(id=job_id).update(fields)
+    db.session.commit()
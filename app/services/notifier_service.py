@@ -0,0 +1,343 @@
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from flask import current_app
+from .email_service import notification_recipients, send_notification_email
+from .instance_files import instance_file, read_json, write_json
+from .state_machine import ALERT, RECOVERY, DEGRADED, FLAPPING
+from .stats_service import percentile
+
+# Monitoring notifications (site alerts, recoveries, slowness, certificates)
+# go out through pluggable channels. notify() only queues them: each channel
+# kind has its own bounded queue and worker threads, so a slow or failing SMTP
+# server or webhook never holds up check_sites, nor the other channels.
+
+CERT_EXPIRY = 'cert_expiry'
+TEST = 'test'
+
+@dataclass
+class Notification:
+    event: str
+    subject: str
+    text: str
+    site: dict = None
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def payload(self):
+        # JSON body for webhooks
+        return {
+            'event': self.event,
+            'subject': self.subject,
+            'text': self.text,
+            'site': self.site,
+            'created_at': self.created_at.isoformat(timespec='seconds'),
+        }
+
+def site_notification(event, site, settings):
+    now = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    if event == ALERT:
+        subject = f"ALERTA: {site.name} está OFFLINE"
+        text = (f"O site {site.name} ({site.url}) está inacessível há mais de {settings.alert_threshold} minutos."
+                f"\n\nHorário: {now}\nErro: {site.error_message}")
+    elif event == RECOVERY:
+        subject = f"RECUPERAÇÃO: {site.name} está ONLINE novamente"
+        text = f"O site {site.name} ({site.url}) voltou a responder.\n\nHorário: {now}"
+    elif event == DEGRADED:
+        subject = f"AVISO: {site.name} está LENTO"
+        text = (f"O site {site.name} ({site.url}) está respondendo, mas com lentidão."
+                f"\n\nHorário: {now}\nDetalhe: {site.error_message}")
+    elif event == FLAPPING:
+        subject = f"AVISO: {site.name} está INSTÁVEL"
+        text = (f"O site {site.name} ({site.url}) está alternando entre fora do ar e no ar."
+                f"\n\nHorário: {now}\nDetalhe: {site.error_message}\n\n"
+                f"Novas quedas e recuperações não serão notificadas até que ele se estabilize.")
+    else:
+        raise ValueError(f"Unknown site event: {event}")
+
+    site_info = {'id': site.id, 'name': site.name, 'url': site.url, 'status': site.status,
+                 'error_message': site.error_message}
+    return Notification(event, subject, text, site=site_info)
+
+def cert_notification(host, expires_at, sites):
+    days_left = (expires_at - datetime.now()).days
+    if days_left < 0:
+        subject = f"ALERTA: Certificado TLS de {host} EXPIRADO"
+    else:
+        subject = f"AVISO: Certificado TLS de {host} expira em {days_left} dia(s)"
+    site_lines = "\n".join(f"- {site.name} ({site.url})" for site in sites)
+    text = f"O certificado TLS de {host} expira em {expires_at.strftime('%d/%m/%Y %H:%M')}.\n\nSites afetados:\n{site_lines}\n"
+    return Notification(CERT_EXPIRY, subject, text)
+
+# --- Channels ---
+
+_session = None
+_session_lock = threading.Lock()
+
+def _http_session():
+    # One pooled session for every webhook delivery (keep-alive per host)
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+class Channel:
+    """
+    A delivery target. `kind` picks the queue/worker it goes through;
+    send() raises on failure so the dispatcher can retry it.
+    """
+    kind = None
+
+    def __init__(self, target):
+        self.target = target
+
+    def send(self, notification, timeout):
+        raise NotImplementedError
+
+class EmailChannel(Channel):
+    kind = 'email'
+
+    def __init__(self, target, settings):
+        super().__init__(target)
+        # Detached copy: delivery runs on another thread, without a session
+        self.settings = SimpleNamespace(smtp_server=settings.smtp_server, smtp_port=settings.smtp_port,
+                                        email_user=settings.email_user, email_password=settings.email_password)
+
+    def send(self, notification, timeout):
+        send_notification_email(notification.subject, notification.text, self.settings, self.target, timeout=timeout)
+
+class WebhookChannel(Channel):
+    # POSTs the notification as JSON (see Notification.payload)
+    kind = 'webhook'
+
+    def body(self, notification):
+        return notification.payload()
+
+    def send(self, notification, timeout):
+        response = _http_session().post(self.target, json=self.body(notification), timeout=timeout)
+        response.raise_for_status()
+
+class ChatChannel(WebhookChannel):
+    # Slack / Teams / Mattermost incoming webhooks all accept {"text": ...}
+    kind = 'chat'
+
+    def body(self, notification):
+        return {'text': f"*{notification.subject}*\n{notification.text}"}
+
+def channels_for(settings):
+    """Channels configured in GlobalSettings (needs an app context for recipients)."""
+    channels = []
+    if settings.email_user and settings.email_password:
+        channels += [EmailChannel(recipient, settings) for recipient in notification_recipients()]
+    if settings.webhook_url:
+        channels.append(WebhookChannel(settings.webhook_url))
+    if settings.chat_webhook_url:
+        channels.append(ChatChannel(settings.chat_webhook_url))
+    return channels
+
+# --- Dispatch ---
+
+STATS_FILE = 'notification_stats.json'
+STATS_PUBLISH_INTERVAL = 1.0 # Seconds; counters are written to instance/ at most this often
+
+class _ChannelStats:
+    def __init__(self):
+        self.sent = self.failed = self.retries = self.dropped = 0
+        self.latencies = deque(maxlen=500) # ms from notify() to delivery
+
+    def as_dict(self, queued, retrying):
+        latencies = sorted(self.latencies)
+        return {
+            'queued': queued, 'retrying': retrying, 'sent': self.sent, 'failed': self.failed,
+            'retries': self.retries, 'dropped': self.dropped,
+            'p50_ms': round(percentile(latencies, 50)) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95)) if latencies else None,
+        }
+
+class NotificationDispatcher:
+    """
+    One bounded queue per channel kind, served by its own worker threads
+    (email_workers for e-mail, one per webhook so its messages keep their
+    order). A failed delivery does not hold up its worker: it is parked and
+    put back on the queue after retry_base * 2**n seconds by the timer
+    thread, which also publishes the counters to instance/ for the admin
+    page (the monitor usually runs in another process). When a queue is full
+    new notifications for that channel are dropped (and counted) instead of
+    blocking the caller.
+    """
+
+    def __init__(self, queue_size=1000, max_attempts=4, retry_base=2.0, timeout=10.0, email_workers=4):
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.timeout = timeout
+        self.email_workers = email_workers
+        self.stats_path = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._queues = {}
+        self._stats = {}
+        self._retrying = [] # heap of (due monotonic time, seq, kind, delivery)
+        self._seq = itertools.count()
+        self._timer = None
+        self._started_at = datetime.now()
+        self._stats_changed = False
+        self._stats_published_at = 0.0
+
+    def configure(self, config):
+        self.queue_size = config.get('NOTIFY_QUEUE_SIZE', 1000)
+        self.max_attempts = config.get('NOTIFY_MAX_ATTEMPTS', 4)
+        self.retry_base = config.get('NOTIFY_RETRY_BASE', 2.0)
+        self.timeout = config.get('NOTIFY_TIMEOUT', 10.0)
+        self.email_workers = config.get('NOTIFY_EMAIL_WORKERS', 4)
+        self.stats_path = instance_file(STATS_FILE)
+
+    def _queue(self, kind):
+        with self._lock:
+            q = self._queues.get(kind)
+            if q is None:
+                q = self._queues[kind] = queue.Queue(maxsize=self.queue_size)
+                self._stats[kind] = _ChannelStats()
+                for n in range(max(self.email_workers, 1) if kind == 'email' else 1):
+                    threading.Thread(target=self._work, args=(kind, q), name=f'notify-{kind}-{n}',
+                                     daemon=True).start()
+                if self._timer is None:
+                    self._timer = threading.Thread(target=self._run_timer, name='notify-timer', daemon=True)
+                    self._timer.start()
+            return q
+
+    def submit(self, channel, notification):
+        try:
+            # (channel, notification, time queued, attempt)
+            self._queue(channel.kind).put_nowait((channel, notification, time.perf_counter(), 1))
+            return True
+        except queue.Full:
+            self._count(channel.kind, 'dropped')
+            print(f"Notification queue for {channel.kind} is full; dropped '{notification.subject}'")
+            return False
+
+    def _work(self, kind, q):
+        while True:
+            delivery = q.get()
+            try:
+                self._deliver(kind, delivery)
+            finally:
+                q.task_done()
+
+    def _deliver(self, kind, delivery):
+        channel, notification, queued_at, attempt = delivery
+        try:
+            channel.send(notification, self.timeout)
+        except Exception as e:
+            if attempt == self.max_attempts:
+                self._count(kind, 'failed')
+                print(f"Failed to send '{notification.subject}' via {kind} to {channel.target}: {e}")
+                return
+            self._count(kind, 'retries')
+            due = time.monotonic() + self.retry_base * 2 ** (attempt - 1)
+            retry = (channel, notification, queued_at, attempt + 1)
+            with self._lock:
+                heapq.heappush(self._retrying, (due, next(self._seq), kind, retry))
+                self._wakeup.notify()
+        else:
+            latency_ms = (time.perf_counter() - queued_at) * 1000
+            self._count(kind, 'sent', latency_ms)
+            print(f"Sent '{notification.subject}' via {kind} to {channel.target} ({latency_ms:.0f} ms)")
+
+    def _count(self, kind, name, latency_ms=None):
+        with self._lock:
+            stats = self._stats[kind]
+            setattr(stats, name, getattr(stats, name) + 1)
+            if latency_ms is not None:
+                stats.latencies.append(latency_ms)
+            self._stats_changed = True
+            self._wakeup.notify()
+
+    def _run_timer(self):
+        # Puts due retries back on their queues and publishes changed counters
+        while True:
+            with self._lock:
+                while True:
+                    now = time.monotonic()
+                    while self._retrying and self._retrying[0][0] <= now:
+                        _, _, kind, delivery = heapq.heappop(self._retrying)
+                        try:
+                            self._queues[kind].put_nowait(delivery)
+                        except queue.Full:
+                            self._stats[kind].failed += 1
+                            self._stats_changed = True
+                            print(f"Notification queue for {kind} is full; gave up on '{delivery[1].subject}'")
+                    publish_at = self._stats_published_at + STATS_PUBLISH_INTERVAL
+                    if self._stats_changed and self.stats_path and now >= publish_at:
+                        break
+                    waits = [self._retrying[0][0] - now] if self._retrying else []
+                    if self._stats_changed and self.stats_path:
+                        waits.append(publish_at - now)
+                    self._wakeup.wait(min(waits) if waits else None)
+                self._stats_changed = False
+                self._stats_published_at = now
+                path, stats = self.stats_path, self._stats_snapshot()
+            try:
+                write_json(path, {'updated_at': datetime.now().isoformat(timespec='seconds'),
+                                  'started_at': self._started_at.isoformat(timespec='seconds'),
+                                  'pid': os.getpid(), 'channels': stats})
+            except OSError as e:
+                print(f"Could not publish notification stats: {e}")
+
+    def drain(self, timeout=30):
+        # Waits (up to `timeout` s) for every queued delivery and pending retry; True if all finished
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pending = self._retrying or any(q.unfinished_tasks for q in self._queues.values())
+            if not pending:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def _stats_snapshot(self):
+        # Caller holds the lock
+        retrying = Counter(kind for _, _, kind, _ in self._retrying)
+        return {kind: self._stats[kind].as_dict(q.qsize(), retrying[kind]) for kind, q in self._queues.items()}
+
+    def stats(self):
+        with self._lock:
+            return self._stats_snapshot()
+
+dispatcher = NotificationDispatcher()
+
+def notify(notification, settings, channels=None):
+    """
+    Queues a notification on every configured channel (or the given ones)
+    and returns right away with how many deliveries were queued.
+    """
+    dispatcher.configure(current_app.config)
+    if channels is None:
+        channels = channels_for(settings)
+    if not channels:
+        print(f"No notification channel configured. '{notification.subject}' skipped.")
+        return 0
+    return sum(dispatcher.submit(channel, notification) for channel in channels)
+
+def load_stats():
+    """
+    Counters last published by the process sending notifications (usually
+    the monitor): {'updated_at', 'started_at', 'pid', 'channels': {kind: {...}}},
+    or None if nothing was published yet.
+    """
+    return read_json(instance_file(STATS_FILE))
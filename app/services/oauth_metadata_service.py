@@ -0,0 +1,78 @@
+import threading
+import time
+from flask import current_app
+from .instance_files import instance_file, read_json, write_json
+
+# Provider metadata (OpenID discovery document + JWKS) shared by every worker
+# through instance/oauth_cache/<name>.json. A fresh worker logs users in with
+# the cached copy instead of a network round trip; once the TTL expires the
+# copy keeps being used while one thread per process refreshes it.
+
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+def _read(path):
+    metadata = read_json(path)
+    return metadata if metadata and '_loaded_at' in metadata else None
+
+def _fetch(url):
+    import requests
+
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    metadata = response.json()
+    if metadata.get('jwks_uri'):
+        response = requests.get(metadata['jwks_uri'], timeout=10)
+        response.raise_for_status()
+        metadata['jwks'] = response.json()
+    metadata['_loaded_at'] = time.time()
+    return metadata
+
+def _refresh(path, url):
+    metadata = _fetch(url)
+    try:
+        write_json(path, metadata)
+    except OSError as e:
+        print(f"Could not write OAuth metadata cache {path}: {e}")
+    return metadata
+
+def _refresh_in_background(path, url, target):
+    with _refresh_lock:
+        if path in _refreshing:
+            return
+        _refreshing.add(path)
+
+    def refresh():
+        try:
+            target.update(_refresh(path, url))
+        except Exception as e:
+            print(f"OAuth metadata refresh failed for {url}: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(path)
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+def ensure_metadata(client, name, url):
+    """
+    Loads provider metadata into an Authlib client before it is used, from
+    memory, then the disk cache, then (only the very first time) the
+    network. Stale metadata is served while a background refresh runs.
+    """
+    ttl = current_app.config.get('OAUTH_METADATA_TTL', 86400)
+    metadata = client.server_metadata
+    loaded_at = metadata.get('_loaded_at')
+    if loaded_at and time.time() - loaded_at < ttl:
+        return
+
+    path = instance_file('oauth_cache', f'{name}.json')
+    cached = _read(path)
+    if cached and cached['_loaded_at'] > (loaded_at or 0):
+        # Refreshed by another worker, or this worker's first login
+        metadata.update(cached)
+        loaded_at = cached['_loaded_at']
+
+    if loaded_at is None:
+        metadata.update(_refresh(path, url))
+    elif time.time() - loaded_at >= ttl:
+        _refresh_in_background(path, url, metadata)
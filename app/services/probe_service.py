@@ -0,0 +1,369 @@
+import hashlib
+import socket
+import threading
+import time
+from dataclasses import dataclass, asdict
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import connection as urllib3_connection, connectionpool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+
+try:
+    # Optional: with dnspython installed the cache honours each record's real TTL
+    import dns.resolver
+except ImportError:
+    dns = None
+
+@dataclass
+class Validators:
+    # Conditional-request cache carried between probes of the same site
+    etag: str = None
+    last_modified: str = None
+    content_hash: str = None
+    text_match: bool = None # expected_text verdict for content_hash
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    error_message: str = None
+    validators: Validators = None # Set on 200/304; None leaves the cache as is
+    not_modified: bool = False # Verdict reused without reading/scanning the body
+    timings: dict = None # Phase durations in ms: dns, connect, tls, ttfb, transfer, total
+    circuit_open: bool = False # Breaker probe found the host unreachable; HTTP was skipped
+
+def result_to_dict(result):
+    return asdict(result)
+
+def result_from_dict(data):
+    data = dict(data)
+    if data.get('validators') is not None:
+        data['validators'] = Validators(**data['validators'])
+    return ProbeResult(**data)
+
+# Phase timings of the probe running on the current thread. The connection
+# classes below write into it; probe_site() resets and reads it.
+_phase = threading.local()
+
+def _record(phase, seconds):
+    timings = getattr(_phase, 'timings', None)
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+# --- DNS cache ---
+
+class DNSCache:
+    """
+    Thread-safe host -> addresses cache shared by every probe. Entries live
+    for the record TTL (dnspython) or `default_ttl` seconds (system resolver).
+    """
+
+    def __init__(self, default_ttl=300):
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = {} # host -> (expires_at, [addresses])
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, host, port):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        addresses, ttl = self._lookup(host, port)
+        with self._lock:
+            self._entries[host] = (now + ttl, addresses)
+        return addresses
+
+    def _lookup(self, host, port):
+        if dns is not None:
+            try:
+                answer = dns.resolver.resolve(host, 'A')
+                return [rr.address for rr in answer], answer.rrset.ttl
+            except Exception:
+                pass # IPv6-only host, /etc/hosts entry, etc. -> system resolver
+
+        infos = socket.getaddrinfo(host, port, connection.allowed_gai_family(), socket.SOCK_STREAM)
+        # Keep resolver order, drop duplicates
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        return addresses, self.default_ttl
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+dns_cache = DNSCache()
+
+class _CachedDNSConnectionMixin:
+    # Same as urllib3's _new_conn, but resolving through dns_cache.
+    # self.host (SNI / Host header) is left untouched.
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            addresses = dns_cache.resolve(self._dns_host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        finally:
+            _record('dns', time.perf_counter() - started)
+
+        started = time.perf_counter()
+        last_error = None
+        try:
+            for address in addresses:
+                try:
+                    return connection.create_connection(
+                        (address, self.port),
+                        self.timeout,
+                        source_address=self.source_address,
+                        socket_options=self.socket_options,
+                    )
+                except socket.timeout as e:
+                    raise ConnectTimeoutError(
+                        self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+                    ) from e
+                except OSError as e:
+                    last_error = e
+            raise NewConnectionError(self, f"Failed to establish a new connection: {last_error}")
+        finally:
+            _record('connect', time.perf_counter() - started)
+
+# Same class names as urllib3's so error messages read exactly as before
+class HTTPConnection(_CachedDNSConnectionMixin, urllib3_connection.HTTPConnection):
+    pass
+
+class HTTPSConnection(_CachedDNSConnectionMixin, urllib3_connection.HTTPSConnection):
+    def connect(self):
+        # connect() = _new_conn() (dns + connect, recorded there) + TLS handshake
+        started = time.perf_counter()
+        before = dict(getattr(_phase, 'timings', None) or {})
+        try:
+            super().connect()
+        finally:
+            after = getattr(_phase, 'timings', None) or {}
+            tcp = sum(after.get(k, 0.0) - before.get(k, 0.0) for k in ('dns', 'connect'))
+            _record('tls', max(time.perf_counter() - started - tcp, 0.0))
+
+class HTTPConnectionPool(connectionpool.HTTPConnectionPool):
+    ConnectionCls = HTTPConnection
+
+class HTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+    ConnectionCls = HTTPSConnection
+
+class _ProbeAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': HTTPConnectionPool,
+            'https': HTTPSConnectionPool,
+        }
+
+# --- Concurrency limits ---
+
+class HostLimiter:
+    """
+    Caps in-flight probes per host and overall (across every run in this
+    process: scheduled ticks, forced runs and single-site checks).
+    """
+
+    def __init__(self, max_total, max_per_host):
+        self.max_total = max_total
+        self.max_per_host = max_per_host
+        self._total = threading.BoundedSemaphore(max_total)
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host_semaphore(self, host):
+        with self._lock:
+            sem = self._hosts.get(host)
+            if sem is None:
+                sem = self._hosts[host] = threading.BoundedSemaphore(self.max_per_host)
+            return sem
+
+    def acquire(self, host):
+        # Host slot first, so a probe queued behind a busy host never holds a global slot
+        host_sem = self._host_semaphore(host)
+        host_sem.acquire()
+        self._total.acquire()
+        return host_sem
+
+    def release(self, host_sem):
+        self._total.release()
+        host_sem.release()
+
+_limiter = None
+_session = None
+_config_lock = threading.Lock()
+
+def configure(config):
+    """
+    (Re)builds the shared limiter and HTTP session from app config. Cheap to
+    call at the start of every run; only rebuilds when the limits change.
+    """
+    global _limiter, _session
+    max_total = config.get('MONITOR_MAX_CONCURRENCY', 16)
+    max_per_host = config.get('MONITOR_MAX_PER_HOST', 2)
+    dns_cache.default_ttl = config.get('MONITOR_DNS_TTL', 300)
+
+    with _config_lock:
+        if _limiter and (_limiter.max_total, _limiter.max_per_host) == (max_total, max_per_host):
+            return
+
+        _limiter = HostLimiter(max_total, max_per_host)
+
+        session = requests.Session()
+        # Probes must behave like independent requests: no cookie carry-over
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _ProbeAdapter(pool_connections=max_total, pool_maxsize=max_per_host)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+
+def host_of(url):
+    return (urlsplit(url).hostname or '').lower()
+
+def interleave_by_host(items, url_of):
+    """
+    Reorders items round-robin by host so a pool of workers spreads over
+    many origins instead of queueing behind one host's cap.
+    """
+    buckets = {}
+    for item in items:
+        buckets.setdefault(host_of(url_of(item)), []).append(item)
+
+    ordered = []
+    queues = list(buckets.values())
+    while queues:
+        ordered.extend(queue.pop(0) for queue in queues)
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+def probe_site(url, expected_text, validators=None, timeout=30, breaker_timeout=None):
+    """
+    Fetches a URL and validates status code and expected text. Never raises;
+    network errors are reported as a failed ProbeResult.
+
+    With cached `validators` the request is conditional (If-None-Match /
+    If-Modified-Since). On a 304, or a 200 whose body hashes the same as
+    last time, the cached expected_text verdict is reused instead of
+    decoding and scanning the page again.
+
+    `timeout` (seconds) applies to connecting and to each read. With a
+    `breaker_timeout` (circuit open, site known to be down) only a TCP
+    connect is tried first; the full request follows if the host accepts it.
+    URLs requested through a proxy (HTTP(S)_PROXY/NO_PROXY) skip that
+    check, since a direct connect says nothing about them.
+
+    A tcp://host:port URL is a host check: a TCP connect and nothing else.
+    """
+    if _session is None:
+        configure({})
+    # Keep local references: configure() may swap them while we run
+    limiter, session = _limiter, _session
+
+    cached = validators if validators and validators.text_match is not None else None
+    headers = {}
+    if cached and cached.etag:
+        headers['If-None-Match'] = cached.etag
+    if cached and cached.last_modified:
+        headers['If-Modified-Since'] = cached.last_modified
+
+    slot = limiter.acquire(host_of(url))
+    _phase.timings = timings = {}
+    started = time.perf_counter()
+    try:
+        host_check = urlsplit(url).scheme == 'tcp'
+        breaker = breaker_timeout and not (session.trust_env and _proxied(url))
+        error = _tcp_probe(url, breaker_timeout or timeout) if host_check or breaker else None
+        if host_check:
+            result = ProbeResult(error is None, f"Connection Error: {error}" if error else None)
+        elif error:
+            result = ProbeResult(False, f"Connection Error: {error}", circuit_open=True)
+        else:
+            result = _probe(session, url, expected_text, headers, cached, timings, timeout)
+    except Exception as e:
+        result = ProbeResult(False, f"Connection Error: {str(e)}")
+    finally:
+        _phase.timings = None
+        limiter.release(slot)
+
+    timings['total'] = time.perf_counter() - started
+    result.timings = {phase: int(round(seconds * 1000)) for phase, seconds in timings.items()}
+    return result
+
+def _proxied(url):
+    # Whether requests would send this URL through a proxy from the environment
+    return requests.utils.select_proxy(url, requests.utils.get_environ_proxies(url)) is not None
+
+def _tcp_probe(url, timeout):
+    # Cheap reachability check for the circuit breaker. Returns an error message, or None if connected.
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    started = time.perf_counter()
+    try:
+        address = dns_cache.resolve(parts.hostname, port)[0]
+    except OSError as e:
+        return f"Failed to resolve '{parts.hostname}' ({e})"
+    finally:
+        _record('dns', time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        socket.create_connection((address, port), timeout=timeout).close()
+        return None
+    except socket.timeout:
+        return f"Connection to {parts.hostname} timed out. (connect timeout={timeout})"
+    except OSError as e:
+        return f"Failed to establish a new connection: {e}"
+    finally:
+        _record('connect', time.perf_counter() - started)
+
+def _probe(session, url, expected_text, headers, cached, timings, timeout):
+    # stream=True returns once headers are in, so body transfer is timed apart.
+    # TTFB is what remains of that wait after connection setup (incl. redirects).
+    started = time.perf_counter()
+    response = session.get(url, timeout=timeout, headers=headers, stream=True)
+    connection_setup = sum(timings.get(k, 0.0) for k in ('dns', 'connect', 'tls'))
+    timings['ttfb'] = max(time.perf_counter() - started - connection_setup, 0.0)
+
+    with response:
+        if response.status_code == 304 and cached:
+            return _text_result(expected_text, cached.text_match, cached, not_modified=True)
+        if response.status_code != 200:
+            return ProbeResult(False, f"Status Code: {response.status_code}")
+
+        started = time.perf_counter()
+        body = response.content
+        timings['transfer'] = time.perf_counter() - started
+
+        content_hash = hashlib.blake2b(body, digest_size=16).hexdigest()
+        if cached and cached.content_hash == content_hash:
+            text_match = cached.text_match
+            not_modified = True
+        else:
+            text_match = not expected_text or expected_text in response.text
+            not_modified = False
+
+        fresh = Validators(
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            content_hash=content_hash,
+            text_match=text_match,
+        )
+        return _text_result(expected_text, text_match, fresh, not_modified=not_modified)
+
+def _text_result(expected_text, text_match, validators, not_modified):
+    if text_match:
+        return ProbeResult(True, validators=validators, not_modified=not_modified)
+    return ProbeResult(False, f"Texto esperado '{expected_text}' não encontrado.",
+                       validators=validators, not_modified=not_modified)
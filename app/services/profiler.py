@@ -0,0 +1,224 @@
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app, g, request
+from .instance_files import instance_file, read_json, write_json
+
+# On-demand profiling of monitoring ticks (check_sites) and web requests.
+# An admin arms it from the web; since the monitor usually runs in another
+# process, the request lives in instance/profiles/armed.json and every
+# process reads it from there. While nothing is armed the only cost is an
+# os.stat() at most once per second per process.
+
+PROFILE_DIR = 'profiles'
+ARMED_FILE = 'armed.json'
+TARGETS = ('tick', 'route')
+MODES = ('cprofile', 'sampling')
+
+_lock = threading.Lock()
+_armed_cache = (0.0, None, None) # (monotonic time checked, file mtime, armed request)
+
+def profile_dir():
+    return instance_file(PROFILE_DIR)
+
+def arm(target, mode, count, route=None, armed_by=None):
+    """Profiles the next `count` ticks, or requests whose path starts with `route`."""
+    write_json(os.path.join(profile_dir(), ARMED_FILE), {
+        'target': target, 'mode': mode, 'remaining': count, 'route': route,
+        'armed_by': armed_by, 'armed_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    _reset_cache()
+
+def disarm():
+    try:
+        os.remove(os.path.join(profile_dir(), ARMED_FILE))
+    except FileNotFoundError:
+        pass
+    _reset_cache()
+
+def _reset_cache():
+    global _armed_cache
+    with _lock:
+        _armed_cache = (0.0, None, None)
+
+def armed():
+    # Current request or None; the file is looked at no more than once a second
+    global _armed_cache
+    now = time.monotonic()
+    with _lock:
+        checked_at, mtime, data = _armed_cache
+        if now - checked_at < 1.0:
+            return data
+    path = os.path.join(profile_dir(), ARMED_FILE)
+    try:
+        current_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        current_mtime, data = None, None
+    else:
+        if current_mtime != mtime:
+            data = read_json(path)
+    with _lock:
+        _armed_cache = (now, current_mtime, data)
+    return data
+
+def _claim(target, path=None):
+    """
+    Takes one capture of the armed request if it matches, counting it down.
+    Processes claiming at the same moment may take one capture too many.
+    """
+    armed_request = armed()
+    if not armed_request or armed_request['target'] != target:
+        return None
+    if target == 'route' and not (path or '').startswith(armed_request['route'] or '/'):
+        return None
+    remaining = armed_request['remaining'] - 1
+    if remaining > 0:
+        write_json(os.path.join(profile_dir(), ARMED_FILE), {**armed_request, 'remaining': remaining})
+        _reset_cache()
+    else:
+        disarm()
+    return armed_request['mode']
+
+# --- Capture ---
+
+class Sampler:
+    """
+    Samples the stacks of the given threads (all but itself when None) every
+    `interval` seconds and counts them, for flame graphs (collapsed stacks).
+    """
+
+    def __init__(self, interval=0.005, thread_ids=None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        names = {}
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        # Brendan Gregg's folded format: "root;...;leaf count", one stack per line
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class _Capture:
+    def __init__(self, label, mode, thread_ids=None):
+        self.label = label
+        self.mode = mode
+        if mode == 'sampling':
+            interval = current_app.config.get('PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000
+            self._profiler = Sampler(interval, thread_ids)
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        if self.mode == 'sampling':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.mode == 'sampling':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        elapsed_ms = (time.perf_counter() - self.started_at) * 1000
+
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', self.label).strip('_') or 'root'
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{slug}-{elapsed_ms:.0f}ms"
+        if self.mode == 'sampling':
+            path = os.path.join(directory, f"{name}.collapsed")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self._profiler.collapsed())
+        else:
+            path = os.path.join(directory, f"{name}.pstats")
+            self._profiler.dump_stats(path)
+        print(f"Profiled {self.label} ({elapsed_ms:.0f} ms): {path}")
+        _prune(directory, current_app.config.get('PROFILE_KEEP', 50))
+
+@contextmanager
+def profiled_tick():
+    # Wraps a check_sites tick (needs an app context); a no-op unless armed
+    mode = _claim('tick')
+    if mode is None:
+        yield
+        return
+    # Ticks fan probes out to worker threads, so sampling covers all threads
+    capture = _Capture('tick', mode)
+    capture.start()
+    try:
+        yield
+    finally:
+        capture.stop()
+
+def init_app(app):
+    @app.before_request
+    def _start_request_profile():
+        mode = _claim('route', request.path)
+        if mode is not None:
+            g.profile_capture = _Capture(f"{request.method} {request.path}", mode,
+                                         thread_ids={threading.get_ident()})
+            g.profile_capture.start()
+
+    @app.teardown_request
+    def _stop_request_profile(exc):
+        capture = g.pop('profile_capture', None)
+        if capture is not None:
+            capture.stop()
+
+# --- Results ---
+
+def profiles():
+    # Captured files, newest first: [{'name', 'size', 'created_at'}]
+    directory = profile_dir()
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(('.pstats', '.collapsed'))]
+    except FileNotFoundError:
+        return []
+    result = []
+    for name in names:
+        stat = os.stat(os.path.join(directory, name))
+        result.append({'name': name, 'size': stat.st_size, 'created_at': datetime.fromtimestamp(stat.st_mtime)})
+    return sorted(result, key=lambda item: item['created_at'], reverse=True)
+
+def delete_profile(name):
+    # Only names listed by profiles(), never a path from outside the directory
+    if name in {item['name'] for item in profiles()}:
+        os.remove(os.path.join(profile_dir(), name))
+
+def _prune(directory, keep):
+    for item in profiles()[keep:]:
+        try:
+            os.remove(os.path.join(directory, item['name']))
+        except OSError:
+            pass
@@ -0,0 +1,205 @@
+import itertools
+import math
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from ..extensions import db
+from ..models import Site, SiteCheck
+from .state_machine import get_check_interval, transition, ALERT, FLAPPING
+from .stats_service import percentile
+
+# Backtests alert settings offline: probe outcomes (recorded SiteCheck rows
+# or a synthetic outage model) are replayed in simulated time through the
+# same state machine and check cadence the monitor uses. Time jumps straight
+# from one check of a site to its next one, so months replay in seconds.
+
+# What would have been observed for one site: `outages` are sorted,
+# non-overlapping (start, end) intervals during which every probe fails
+Trace = namedtuple('Trace', 'site_id name check_interval retry_interval start end outages')
+
+# Settings that can be varied between runs (GlobalSettings column names)
+TUNABLE = ('alert_threshold', 'interval_weekday', 'interval_weekend', 'interval_warning', 'interval_offline',
+           'flap_threshold', 'flap_window')
+
+class _ReplaySite:
+    # Stand-in for Site with only what the state machine reads
+    __slots__ = ('check_interval', 'retry_interval', 'status', 'first_failure_time', 'breaker_failures',
+                 'recent_transitions')
+
+    def __init__(self, trace):
+        self.check_interval = trace.check_interval
+        self.retry_interval = trace.retry_interval
+        self.status = 'online'
+        self.first_failure_time = None
+        self.breaker_failures = 0
+        self.recent_transitions = None
+
+def recorded_traces(days):
+    """
+    Traces from the SiteCheck rows of the last `days` days (limited by
+    MONITOR_TIMING_RETENTION_DAYS). A run of failed probes is taken as an
+    outage from its first failure until the next successful probe.
+    """
+    since = datetime.now() - timedelta(days=days)
+    sites = {site.id: site for site in Site.query.all()}
+    rows = db.session.query(SiteCheck.site_id, SiteCheck.checked_at, SiteCheck.ok).filter(
+        SiteCheck.checked_at >= since
+    ).order_by(SiteCheck.site_id, SiteCheck.checked_at)
+
+    traces = []
+    for site_id, checks in itertools.groupby(rows, key=lambda row: row[0]):
+        site = sites.get(site_id)
+        if site is None:
+            continue
+        outages, down_since, first, last = [], None, None, None
+        for _, checked_at, ok in checks:
+            first = first or checked_at
+            last = checked_at
+            if not ok and down_since is None:
+                down_since = checked_at
+            elif ok and down_since is not None:
+                outages.append((down_since, checked_at))
+                down_since = None
+        if down_since is not None:
+            outages.append((down_since, last))
+        traces.append(Trace(site_id, site.name, site.check_interval, site.retry_interval, first, last, outages))
+    return traces
+
+def synthetic_traces(sites, days, outages_per_week=1.0, mean_outage_minutes=45, blips_per_day=2.0, seed=42):
+    """
+    Random traces: real outages (lognormal duration around
+    mean_outage_minutes) plus short blips of under 3 minutes that a good
+    setting should not alert on. Both arrive as Poisson processes.
+    """
+    rng = random.Random(seed)
+    end = datetime.now().replace(second=0, microsecond=0)
+    start = end - timedelta(days=days)
+    # lognormal with sigma 1: mean = exp(mu + 1/2)
+    mu = math.log(mean_outage_minutes) - 0.5
+
+    def arrivals(per_minute, duration):
+        events, t = [], 0.0
+        while per_minute > 0:
+            t += rng.expovariate(per_minute)
+            if t >= days * 1440:
+                return events
+            events.append((t, duration()))
+        return events
+
+    traces = []
+    for site_id in range(1, sites + 1):
+        events = arrivals(outages_per_week / (7 * 1440), lambda: rng.lognormvariate(mu, 1.0))
+        events += arrivals(blips_per_day / 1440, lambda: rng.uniform(0.5, 3))
+        outages = []
+        for offset, minutes in sorted(events):
+            outage_start = start + timedelta(minutes=offset)
+            outage_end = min(outage_start + timedelta(minutes=minutes), end)
+            if outages and outage_start <= outages[-1][1]:
+                # Overlapping events form one outage
+                outages[-1] = (outages[-1][0], max(outages[-1][1], outage_end))
+            else:
+                outages.append((outage_start, outage_end))
+        traces.append(Trace(site_id, f'Sintético {site_id}', None, None, start, end, outages))
+    return traces
+
+def replay_site(trace, settings):
+    """
+    Runs one trace through the state machine. `settings` needs the TUNABLE
+    attributes. Returns (alert times, flapping notifications, number of
+    probes); a site that starts flapping while down counts as alerted.
+    """
+    site = _ReplaySite(trace)
+    threshold_seconds = settings.alert_threshold * 60
+    flap_window_seconds = (settings.flap_window or 0) * 60
+    outages, cursor = trace.outages, 0
+    alerts, flaps, probes = [], 0, 0
+
+    now = trace.start
+    while now < trace.end:
+        while cursor < len(outages) and outages[cursor][1] <= now:
+            cursor += 1
+        ok = cursor == len(outages) or now < outages[cursor][0]
+
+        change = transition(site, ok, now, threshold_seconds, flap_window_seconds=flap_window_seconds,
+                            flap_threshold=settings.flap_threshold or 0)
+        site.status = change.status
+        site.first_failure_time = change.first_failure_time
+        site.breaker_failures = change.breaker_failures
+        site.recent_transitions = change.recent_transitions
+        if FLAPPING in change.events:
+            flaps += 1
+        if ALERT in change.events or FLAPPING in change.events and not ok:
+            alerts.append(now)
+        probes += 1
+
+        # The scheduler ticks every minute, so checks land on whole minutes
+        interval = get_check_interval(site, settings, now.weekday() >= 5)
+        now += timedelta(minutes=max(math.ceil(interval), 1))
+    return alerts, flaps, probes
+
+def score(trace, alerts, min_outage_minutes):
+    """
+    Matches alerts to outages. Outages of at least min_outage_minutes are
+    real: alerting on one counts as detected (with its delay), missing it
+    as missed. An alert during a shorter outage is a false positive.
+    """
+    min_outage = timedelta(minutes=min_outage_minutes)
+    result = {'outages': 0, 'detected': 0, 'missed': 0, 'false_positives': 0, 'delays': []}
+    alerted = {}
+    cursor = 0
+    for alert in alerts:
+        # Every alert happens during an outage, since its probe failed
+        while trace.outages[cursor][1] <= alert:
+            cursor += 1
+        alerted.setdefault(cursor, alert)
+
+    for index, (start, end) in enumerate(trace.outages):
+        real = end - start >= min_outage
+        if real:
+            result['outages'] += 1
+        if index in alerted:
+            if real:
+                result['detected'] += 1
+                result['delays'].append((alerted[index] - start).total_seconds() / 60)
+            else:
+                result['false_positives'] += 1
+        elif real:
+            result['missed'] += 1
+    return result
+
+def backtest(traces, base_settings, grid, min_outage_minutes=10):
+    """
+    Replays every trace for each combination of `grid` ({setting: [values]})
+    on top of base_settings. Returns one summary dict per combination.
+    """
+    keys = list(grid)
+    results = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        settings = SimpleNamespace(**{key: getattr(base_settings, key) for key in TUNABLE})
+        for key, value in zip(keys, values):
+            setattr(settings, key, value)
+
+        totals = {'alerts': 0, 'flapping': 0, 'probes': 0, 'outages': 0, 'detected': 0, 'missed': 0,
+                  'false_positives': 0}
+        delays = []
+        for trace in traces:
+            alerts, flaps, probes = replay_site(trace, settings)
+            totals['flapping'] += flaps
+            scored = score(trace, alerts, min_outage_minutes)
+            delays.extend(scored.pop('delays'))
+            totals['alerts'] += len(alerts)
+            totals['probes'] += probes
+            for key, value in scored.items():
+                totals[key] += value
+
+        delays.sort()
+        results.append({
+            'settings': {key: getattr(settings, key) for key in TUNABLE},
+            **totals,
+            'delay_mean': round(sum(delays) / len(delays), 1) if delays else None,
+            'delay_p50': round(percentile(delays, 50), 1) if delays else None,
+            'delay_p95': round(percentile(delays, 95), 1) if delays else None,
+            'delay_max': round(delays[-1], 1) if delays else None,
+        })
+    return results
@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+from urllib.parse import urlparse
+from ..extensions import db
+from ..models import Site
+
+# Columns accepted on import and written on export
+FIELDS = ['name', 'url', 'expected_text', 'check_interval', 'retry_interval']
+
+class ImportFormatError(ValueError):
+    pass
+
+def normalize_url(url):
+    url = (url or '').strip()
+    if url and not url.startswith(('http://', 'https://', 'tcp://')):
+        url = 'https://' + url
+    return url
+
+def parse_sites(raw, fmt):
+    """
+    Parses a CSV (with header row) or JSON (list of objects) payload into a
+    list of dicts. Raises ImportFormatError if the payload can't be read.
+    """
+    if isinstance(raw, bytes):
+        try:
+            raw = raw.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            # Spreadsheets (Excel) often save CSV as Windows-1252
+            try:
+                raw = raw.decode('cp1252')
+            except UnicodeDecodeError:
+                raise ImportFormatError("Arquivo deve estar em UTF-8 ou Windows-1252.")
+
+    if fmt == 'json':
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            raise ImportFormatError(f"JSON inválido: {e}")
+        if isinstance(data, dict):
+            data = data.get('sites', [])
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ImportFormatError("JSON deve ser uma lista de sites.")
+        return data
+
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(raw))
+        if not reader.fieldnames or 'url' not in reader.fieldnames:
+            raise ImportFormatError("CSV deve ter cabeçalho com pelo menos a coluna 'url'.")
+        return list(reader)
+
+    raise ImportFormatError(f"Formato não suportado: {fmt}")
+
+def import_sites(rows, dry_run=False):
+    """
+    Validates and inserts sites in a single transaction. Duplicates (same
+    normalized URL already registered or repeated in the payload) are
+    skipped and reported. Returns a report dict; `created_ids` lists the new
+    site ids (empty on dry run).
+    """
+    existing = {url for (url,) in db.session.query(Site.url)}
+    seen = set()
+    new_sites, duplicates, errors = [], [], []
+
+    for index, row in enumerate(rows, start=1):
+        try:
+            site = _site_from_row(row)
+        except ValueError as e:
+            errors.append({'row': index, 'error': str(e)})
+            continue
+
+        if site.url in existing or site.url in seen:
+            duplicates.append({'row': index, 'name': site.name, 'url': site.url})
+            continue
+
+        seen.add(site.url)
+        new_sites.append(site)
+
+    created_ids = []
+    if not dry_run and new_sites:
+        db.session.add_all(new_sites)
+        db.session.commit()
+        created_ids = [site.id for site in new_sites]
+
+    return {
+        'dry_run': dry_run,
+        'created': len(new_sites),
+        'created_ids': created_ids,
+        'sites': [{'name': site.name, 'url': site.url} for site in new_sites],
+        'duplicates': duplicates,
+        'errors': errors,
+    }
+
+def export_sites(fmt):
+    rows = [
+        {field: getattr(site, field) for field in FIELDS}
+        for site in Site.query.order_by(Site.name).all()
+    ]
+
+    if fmt == 'json':
+        return json.dumps(rows, ensure_ascii=False, indent=2)
+
+    if fmt == 'csv':
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: ('' if v is None else v) for k, v in row.items()})
+        return out.getvalue()
+
+    raise ImportFormatError(f"Formato não suportado: {fmt}")
+
+def _site_from_row(row):
+    name = _text(row, 'name')
+    url = normalize_url(_text(row, 'url'))
+    expected_text = _text(row, 'expected_text') or None
+
+    if not url:
+        raise ValueError("URL obrigatória.")
+    parsed = urlparse(url)
+    if not parsed.netloc or ' ' in parsed.netloc:
+        raise ValueError(f"URL inválida: {url}")
+    if len(url) > 500:
+        raise ValueError("URL muito longa (máx. 500 caracteres).")
+    if not name:
+        name = parsed.netloc
+    if len(name) > 100:
+        raise ValueError("Nome muito longo (máx. 100 caracteres).")
+    if expected_text and len(expected_text) > 200:
+        raise ValueError("Texto esperado muito longo (máx. 200 caracteres).")
+
+    return Site(
+        name=name,
+        url=url,
+        expected_text=expected_text,
+        check_interval=_optional_minutes(row, 'check_interval'),
+        retry_interval=_optional_minutes(row, 'retry_interval'),
+    )
+
+def _text(row, field):
+    # JSON may carry numbers (e.g. a numeric name); lists, objects and booleans are rejected
+    value = row.get(field)
+    if value is None:
+        return ''
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"{field} deve ser texto.")
+    return str(value).strip()
+
+def _optional_minutes(row, field):
+    value = row.get(field)
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        minutes = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} deve ser um número inteiro de minutos.")
+    if minutes < 1:
+        raise ValueError(f"{field} deve ser maior que zero.")
+    return minutes
@@ -0,0 +1,83 @@
+from sqlalchemy import bindparam, select
+from ..extensions import db
+from ..models import Site
+
+# The monitor's view of sites: plain __slots__ rows from a column-only
+# select instead of ORM instances, so a tick over thousands of sites skips
+# attribute instrumentation, the identity map and dirty tracking. Rows are
+# written back with bulk UPDATEs keyed by id, of the columns that changed.
+
+# Read by the check loop, never written by it
+READ_COLUMNS = ('id', 'name', 'url', 'expected_text', 'parent_id', 'check_interval', 'retry_interval')
+# State the check loop moves forward
+STATE_COLUMNS = ('status', 'first_failure_time', 'breaker_failures', 'error_message', 'recent_transitions',
+                 'last_checked', 'etag', 'last_modified', 'content_hash', 'text_match')
+COLUMNS = READ_COLUMNS + STATE_COLUMNS
+
+class SiteRow:
+    """
+    One site as loaded by load_rows(). `parent` is the SiteRow of the site
+    it depends on (loaded even when not selected itself), or None.
+    """
+
+    __slots__ = COLUMNS + ('parent', '_saved')
+
+    def __init__(self, values):
+        for name, value in zip(COLUMNS, values):
+            setattr(self, name, value)
+        self.parent = None
+        self._saved = {name: getattr(self, name) for name in STATE_COLUMNS}
+
+    def changes(self):
+        # State columns that differ from what the database holds
+        return {name: getattr(self, name) for name in STATE_COLUMNS if getattr(self, name) != self._saved[name]}
+
+    def mark_saved(self, *names):
+        # The given columns (all by default) are now in the database, or will be written by someone else
+        for name in names or STATE_COLUMNS:
+            self._saved[name] = getattr(self, name)
+
+    def __repr__(self):
+        return f"<SiteRow {self.id}>"
+
+def load_rows(site_ids=None):
+    """
+    SiteRows of the given sites (all when None), by id. Parents outside
+    site_ids are loaded too, for their status, but not returned.
+    """
+    table = Site.__table__
+    statement = select(*(table.c[name] for name in COLUMNS)).order_by(table.c.id)
+    selected = statement if site_ids is None else statement.where(table.c.id.in_(site_ids))
+    rows = [SiteRow(values) for values in db.session.execute(selected)]
+
+    by_id = {row.id: row for row in rows}
+    missing = {row.parent_id for row in rows if row.parent_id and row.parent_id not in by_id}
+    if missing:
+        for values in db.session.execute(statement.where(table.c.id.in_(missing))):
+            parent = SiteRow(values)
+            by_id[parent.id] = parent
+    for row in rows:
+        row.parent = by_id.get(row.parent_id)
+    return rows
+
+def save_rows(rows):
+    """
+    Writes the changed columns of the given rows with bulk UPDATEs keyed by
+    id, one executemany per set of changed columns (updated_at is bumped as
+    with any ORM update). Sites deleted meanwhile are simply not matched.
+    The caller commits. Returns how many rows were written.
+    """
+    groups = {}
+    for row in rows:
+        changes = row.changes()
+        if changes:
+            groups.setdefault(tuple(sorted(changes)), []).append({'site_id': row.id, **changes})
+            row.mark_saved()
+
+    table = Site.__table__
+    for names, params in groups.items():
+        statement = table.update().where(table.c.id == bindparam('site_id')).values(
+            {name: bindparam(name) for name in names}
+        )
+        db.session.execute(statement, params)
+    return sum(len(params) for params in groups.values())
@@ -0,0 +1,152 @@
+from collections import namedtuple
+
+# Pure online/degraded/warning/offline (and flapping/unreachable) logic, shared by the monitor and the
+# replay engine (replay_service). Nothing here touches the database, the
+# clock or email: callers pass `now` in and carry out the returned events.
+
+# Events a transition asks the caller to act on
+ALERT = 'alert'         # became offline: alert email, open history
+RECOVERY = 'recovery'   # offline site responded again: recovery email, close history
+DEGRADED = 'degraded'   # became degraded: slowness email
+FLAPPING = 'flapping'   # started bouncing: one notification, bounces merged into one incident
+
+Transition = namedtuple('Transition', 'status first_failure_time breaker_failures error_message events '
+                                      'recent_transitions')
+
+def get_check_interval(site, settings, is_weekend):
+    """
+    Minutes to wait before the next check of a site, based on its current state.
+    Warning sites are retried quickly so alert_threshold is honoured; offline
+    sites (circuit open) start at the warning cadence and back off
+    exponentially to interval_offline; healthy sites use the regular
+    (weekday/weekend) cadence.
+    """
+    normal = site.check_interval or (settings.interval_weekend if is_weekend else settings.interval_weekday)
+    retry = min(site.retry_interval or settings.interval_warning or 5, normal)
+
+    if site.status == 'warning' and site.first_failure_time or site.status in ('flapping', 'unreachable'):
+        return retry
+    if site.status == 'offline':
+        ceiling = min(settings.interval_offline or normal, normal)
+        # Capped exponent: the doubling has long passed any real ceiling by then
+        return min(retry * 2 ** min(site.breaker_failures or 0, 16), ceiling)
+    return normal
+
+def transition(site, ok, now, threshold_seconds, error_message=None, cert_days_left=None, latency_alert=None,
+               flap_window_seconds=0, flap_threshold=0):
+    """
+    Next state of a site (anything with status, first_failure_time,
+    breaker_failures and recent_transitions) after a probe at `now`. A
+    failing site goes to warning and, once it has failed for
+    threshold_seconds, offline. A responding site whose TLS certificate
+    expires soon (cert_days_left) is kept in warning; one that responds
+    abnormally slowly (latency_alert) is degraded. A site that went offline
+    or recovered flap_threshold times within flap_window_seconds is
+    flapping (see _flapping).
+    """
+    previous_status = site.status
+    events = []
+    # Consecutive failures with the circuit open; drives the offline back-off
+    breaker_failures = (site.breaker_failures or 0) + 1 if previous_status == 'offline' and not ok else 0
+
+    if ok:
+        # ('flapping' only gets here once flap detection was turned off)
+        if previous_status in ('offline', 'flapping'):
+            events.append(RECOVERY)
+        status, first_failure_time, error_message = 'online', None, None
+
+        if cert_days_left is not None:
+            # No first_failure_time: never escalates to offline, normal cadence
+            status = 'warning'
+            if cert_days_left < 0:
+                error_message = "Certificado TLS expirado."
+            else:
+                error_message = f"Certificado TLS expira em {cert_days_left} dia(s)."
+
+        if latency_alert:
+            # Takes precedence over the certificate warning, which has its own email
+            status, error_message = 'degraded', latency_alert
+            if previous_status != 'degraded':
+                events.append(DEGRADED)
+    elif site.first_failure_time is None:
+        # First failure detected
+        status, first_failure_time = 'warning', now
+    else:
+        # Successive failure
+        first_failure_time = site.first_failure_time
+        if (now - first_failure_time).total_seconds() >= threshold_seconds:
+            status = 'offline'
+            # Alert only when transitioning to offline for the first time
+            if previous_status != 'offline':
+                events.append(ALERT)
+        else:
+            status = 'warning'
+
+    change = Transition(status, first_failure_time, breaker_failures, error_message, tuple(events), None)
+    if flap_threshold and flap_window_seconds:
+        change = _flapping(site, ok, now, change, flap_window_seconds, flap_threshold)
+    return change
+
+def dependency_down(parent):
+    # A site is not probed while the site it depends on is confirmed down
+    return parent is not None and parent.status in ('offline', 'unreachable')
+
+def dependency_failing(parent):
+    # Parent failing but not yet confirmed: its children must not alert first
+    return parent is not None and parent.status == 'warning' and parent.first_failure_time is not None
+
+def unreachable(site, parent_name):
+    """
+    Next state of a site that was not probed because the site it depends on
+    is down: 'unreachable', with no events, so only the root cause alerts.
+    A site already offline or flapping on its own keeps its incident as is
+    until it can be probed again.
+    """
+    if site.status in ('offline', 'flapping'):
+        return Transition(site.status, site.first_failure_time, site.breaker_failures, site.error_message, (),
+                          site.recent_transitions)
+    return Transition('unreachable', None, 0, f"Inacessível: depende de {parent_name}, que está fora do ar.", (),
+                      site.recent_transitions)
+
+def _flapping(site, ok, now, change, window_seconds, threshold):
+    """
+    Flap detection on top of a regular transition. recent_transitions keeps
+    the site's recent bounces as "d<timestamp>" (went offline) and
+    "u<timestamp>" (recovered). A site enters flapping on the bounce that
+    brings the count within the window to `threshold`; from then on bounces
+    only get recorded, with no alert or recovery, and it leaves flapping
+    once fewer than half as many remain in the window.
+    """
+    if not site.recent_transitions and site.status not in ('offline', 'flapping') and change.status != 'offline':
+        return change # No bounce now nor recently: the common case, kept cheap
+    bounces = [(item[0], float(item[1:])) for item in (site.recent_transitions or '').split()]
+    timestamp = now.timestamp()
+    if site.status == 'flapping':
+        was_down = bool(bounces) and bounces[-1][0] == 'd'
+    else:
+        was_down = site.status == 'offline'
+
+    down = change.status == 'offline'
+    bounce = 'd' if down and not was_down else 'u' if ok and was_down else None
+    if bounce:
+        bounces.append((bounce, timestamp))
+
+    # The latest bounce is kept past the window: it tells whether the site is down
+    recent = [item for item in bounces if timestamp - item[1] < window_seconds]
+    kept = recent or bounces[-1:]
+    recent_transitions = ' '.join(f"{direction}{int(at)}" for direction, at in kept) or None
+    flap_message = f"Instável: {len(recent)} mudança(s) de estado em {window_seconds // 60} min."
+
+    if site.status == 'flapping':
+        # A failure still short of the threshold settles nothing yet
+        if len(recent) >= max(threshold // 2, 1) or not (ok or down):
+            return change._replace(status='flapping', error_message=flap_message, events=(),
+                                   recent_transitions=recent_transitions)
+        # Settled: report where it settled, once
+        events = (ALERT,) if down else (RECOVERY,) + tuple(e for e in change.events if e == DEGRADED)
+        return change._replace(events=events, recent_transitions=recent_transitions)
+
+    if bounce and len(recent) >= threshold:
+        return change._replace(status='flapping', error_message=flap_message, events=(FLAPPING,),
+                               recent_transitions=recent_transitions)
+    return change._replace(recent_transitions=recent_transitions)
@@ -0,0 +1,46 @@
+import math
+from datetime import datetime, timedelta
+from ..extensions import db
+from ..models import SiteCheck
+
+PHASES = ['dns', 'connect', 'tls', 'ttfb', 'transfer', 'total']
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    # Smallest value with at least q% of the samples at or below it (numpy inverted_cdf)
+    rank = max(math.ceil(q / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def latency_percentiles(hours=24):
+    """
+    Per-site p50/p95/p99 of each probe phase over the last `hours`:
+    {site_id: {'total': {'p50': ms, 'p95': ms, 'p99': ms, 'count': n}, 'ttfb': {...}, ...}}
+    Phases with no samples (e.g. TLS on plain HTTP) are left out.
+    """
+    since = datetime.now() - timedelta(hours=hours)
+    columns = [getattr(SiteCheck, f"{phase}_ms") for phase in PHASES]
+    rows = db.session.query(SiteCheck.site_id, *columns).filter(SiteCheck.checked_at >= since)
+
+    samples = {}
+    for site_id, *values in rows:
+        site_samples = samples.setdefault(site_id, {phase: [] for phase in PHASES})
+        for phase, value in zip(PHASES, values):
+            if value is not None:
+                site_samples[phase].append(value)
+
+    summary = {}
+    for site_id, site_samples in samples.items():
+        summary[site_id] = {}
+        for phase, values in site_samples.items():
+            if not values:
+                continue
+            values.sort()
+            summary[site_id][phase] = {
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'count': len(values),
+            }
+    return summary
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from flask import current_app, render_template, send_file
+from markupsafe import Markup
+from .instance_files import instance_file, write_atomic
+
+# The public status page, pre-rendered by the monitor to instance/ so
+# anonymous viewers (or a front proxy serving the files directly) never
+# reach the database. Both files are rewritten atomically, only when what
+# they show changes.
+
+STATUS_HTML = 'status.html'
+STATUS_JSON = 'status.json'
+
+_published = (None, 0.0) # (digest of the shown state, monotonic time written)
+
+def _entry(site):
+    return {
+        'id': site.id,
+        'name': site.name,
+        'url': site.url,
+        'status': site.status,
+        'error_message': site.error_message,
+        'first_failure_time': site.first_failure_time.isoformat(timespec='seconds') if site.first_failure_time else None,
+        'last_checked': site.last_checked.isoformat(timespec='seconds') if site.last_checked else None,
+    }
+
+def publish(sites, refresh_seconds=300):
+    """
+    Writes status.html and status.json for the given sites (needs an app
+    context) if their state changed since the last write. last_checked
+    alone does not count as a change, but the files are refreshed at least
+    every refresh_seconds so it does not lag too far. Returns True if the
+    files were written.
+    """
+    global _published
+    sites = sorted(sites, key=lambda site: site.name)
+    entries = [_entry(site) for site in sites]
+    state = [{key: value for key, value in entry.items() if key != 'last_checked'} for entry in entries]
+    digest = hashlib.sha1(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+
+    published_digest, published_at = _published
+    if digest == published_digest and time.monotonic() - published_at < refresh_seconds:
+        return False
+
+    # Rendered as an anonymous visitor would see it
+    with current_app.test_request_context('/'):
+        site_cards = Markup(render_template('fragments/site_cards.html', sites=sites))
+        html = render_template('index.html', site_cards=site_cards)
+
+    write_atomic(instance_file(STATUS_JSON), json.dumps({
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'sites': entries,
+    }))
+    write_atomic(instance_file(STATUS_HTML), html)
+    _published = (digest, time.monotonic())
+    return True
+
+def serve(name, mimetype):
+    """
+    Response with a published file, or None if it was not written yet.
+    ETag/Last-Modified come from the file, so unchanged pages get a 304.
+    """
+    path = instance_file(name)
+    if not os.path.exists(path):
+        return None
+    return send_file(path, mimetype=mimetype, max_age=current_app.config.get('STATUS_PAGE_MAX_AGE', 60),
+                     conditional=True, etag=True)
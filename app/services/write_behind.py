@@ -0,0 +1,98 @@
+import threading
+import time
+from sqlalchemy import bindparam, insert, or_
+from ..extensions import db
+from ..models import Site, SiteCheck
+
+class WriteBehind:
+    """
+    Volatile per-probe data kept by the monitor and written in batches:
+    last_checked of sites whose state did not change, and their SiteCheck
+    timing rows. Transitions are still committed right away by the caller,
+    so a tick writes rows in proportion to changes, not to the fleet.
+
+    Only enabled in the dedicated monitor process (`flask monitor run`):
+    with in-app schedulers every web worker checks sites, and a check time
+    held back in one worker would leave the site due for all the others.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._last_checked = {} # site_id -> datetime
+        self._checks = [] # SiteCheck column dicts
+        self._last_flush = time.monotonic()
+
+    def touch(self, site, checked_at):
+        # Visible on the row without counting as a change to save now
+        site.last_checked = checked_at
+        site.mark_saved('last_checked')
+        with self._lock:
+            self._last_checked[site.id] = checked_at
+
+    def discard(self, site_id):
+        # The row is being written anyway, with a newer last_checked
+        with self._lock:
+            self._last_checked.pop(site_id, None)
+
+    def add_check(self, row):
+        with self._lock:
+            self._checks.append(row)
+
+    def overlay(self, sites):
+        # Loaded rows (site_rows.SiteRow) may be older than what is pending here
+        with self._lock:
+            pending = dict(self._last_checked)
+        for site in sites:
+            checked_at = pending.get(site.id)
+            if checked_at and (site.last_checked is None or checked_at > site.last_checked):
+                site.last_checked = checked_at
+                site.mark_saved('last_checked')
+
+    def pending(self):
+        with self._lock:
+            return len(self._last_checked) + len(self._checks)
+
+    def flush_if_due(self, interval_seconds):
+        if time.monotonic() - self._last_flush >= interval_seconds:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes everything pending in one transaction (needs an app
+        context). On failure it is kept for the next flush.
+        """
+        with self._lock:
+            last_checked, self._last_checked = self._last_checked, {}
+            checks, self._checks = self._checks, []
+            self._last_flush = time.monotonic()
+        if not last_checked and not checks:
+            return
+
+        try:
+            if last_checked:
+                table = Site.__table__
+                # Never moves last_checked back behind a row written directly since
+                db.session.execute(
+                    table.update().where(
+                        table.c.id == bindparam('site_id'),
+                        or_(table.c.last_checked.is_(None), table.c.last_checked < bindparam('checked')),
+                    ).values(last_checked=bindparam('checked')),
+                    [{'site_id': site_id, 'checked': checked} for site_id, checked in last_checked.items()],
+                )
+            if checks:
+                # Sites deleted since their probe took their timings with them
+                existing = {site_id for (site_id,) in db.session.query(Site.id)}
+                checks = [row for row in checks if row['site_id'] in existing]
+                if checks:
+                    db.session.execute(insert(SiteCheck), checks)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                for site_id, checked in last_checked.items():
+                    self._last_checked.setdefault(site_id, checked)
+                self._checks[:0] = checks
+            raise
+
+write_behind = WriteBehind()
@@ -10,8 +10,43 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
+    # Point both URLs at a local stand-in IdP for testing
+    GOOGLE_DISCOVERY_URL = os.getenv('GOOGLE_DISCOVERY_URL', 'https://accounts.google.com/.well-known/openid-configuration')
+    OAUTH_METADATA_TTL = int(os.getenv('OAUTH_METADATA_TTL', 86400)) # Seconds the cached discovery document/JWKS is trusted
     
     # USP Senha Unica
     USP_CLIENT_KEY = os.environ.get('USP_CLIENT_KEY')
     USP_CLIENT_SECRET = os.environ.get('USP_CLIENT_SECRET')
     USP_CALLBACK_ID = os.environ.get('USP_CALLBACK_ID')
+    USP_OAUTH_BASE_URL = os.environ.get('USP_OAUTH_BASE_URL', 'https://uspdigital.usp.br/wsusuario/oauth/')
+
+    # Monitoring
+    # Set to false on web workers when a separate `flask monitor run` process does the monitoring
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    MONITOR_PROBE_MODE = os.getenv('MONITOR_PROBE_MODE', 'local') # 'local' or 'agents' (flask monitor agent)
+    MONITOR_MAX_WORKERS = int(os.getenv('MONITOR_MAX_WORKERS', 8)) # Concurrent probes per run
+    MONITOR_MAX_CONCURRENCY = int(os.getenv('MONITOR_MAX_CONCURRENCY', 16)) # In-flight probes per process
+    MONITOR_MAX_PER_HOST = int(os.getenv('MONITOR_MAX_PER_HOST', 2)) # In-flight probes per host
+    MONITOR_DNS_TTL = int(os.getenv('MONITOR_DNS_TTL', 300)) # Seconds; real record TTL if dnspython is installed
+    MONITOR_TIMING_RETENTION_DAYS = int(os.getenv('MONITOR_TIMING_RETENTION_DAYS', 7)) # Per-probe timings kept
+    MONITOR_FLUSH_INTERVAL = int(os.getenv('MONITOR_FLUSH_INTERVAL', 300)) # Seconds between batched last_checked/timing writes
+    NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', 1000)) # Pending notifications per channel before dropping
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', 4))
+    NOTIFY_RETRY_BASE = float(os.getenv('NOTIFY_RETRY_BASE', 2)) # Seconds; doubles on every retry
+    NOTIFY_TIMEOUT = float(os.getenv('NOTIFY_TIMEOUT', 10)) # Per delivery attempt
+    NOTIFY_EMAIL_WORKERS = int(os.getenv('NOTIFY_EMAIL_WORKERS', 4)) # E-mails sent in parallel
+    NOTIFY_DRAIN_TIMEOUT = float(os.getenv('NOTIFY_DRAIN_TIMEOUT', 30)) # Seconds the monitor waits for pending notifications on shutdown
+    # Adaptive probe timeout: p99 of recent latency * factor, clamped to [min, max] seconds
+    MONITOR_TIMEOUT_FACTOR = float(os.getenv('MONITOR_TIMEOUT_FACTOR', 4))
+    MONITOR_TIMEOUT_MIN = float(os.getenv('MONITOR_TIMEOUT_MIN', 10))
+    MONITOR_TIMEOUT_MAX = float(os.getenv('MONITOR_TIMEOUT_MAX', 30)) # Also used until a site has enough samples
+    MONITOR_BREAKER_TIMEOUT = float(os.getenv('MONITOR_BREAKER_TIMEOUT', 5)) # TCP check of offline sites
+    MONITOR_LATENCY_SAMPLES = int(os.getenv('MONITOR_LATENCY_SAMPLES', 60)) # Recent probes kept in memory per site (sparkline)
+
+    STATUS_PAGE_MAX_AGE = int(os.getenv('STATUS_PAGE_MAX_AGE', 60)) # Seconds browsers/proxies may reuse the public status page
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5)) # Sampling profiler period
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 50)) # Captured profiles kept in instance/profiles
+    FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', 128)) # Rendered page fragments kept per worker
+
+    # `flask startup-profile` fails when a fresh worker takes longer than this to import and build the app
+    STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', 1000))
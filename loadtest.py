@@ -0,0 +1,314 @@
+"""
+Load test for the web tier (dashboard, failure report and PDF export).
+
+Seeds a temporary SQLite database with N sites, incidents and users, then
+drives the app with concurrent anonymous and logged-in clients and reports
+throughput and latency percentiles per route. Results are saved as JSON so
+runs can be compared before a deploy.
+
+    python loadtest.py --sites 200 --incidents 20000 --concurrency 16 --duration 30
+    python loadtest.py --gunicorn 4                    # against a local Gunicorn on the seeded DB
+    python loadtest.py --url http://localhost:5000 --username admin --password ...
+    python loadtest.py --compare loadtest-results/baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# route name -> (path, needs login)
+ROUTES = {
+    'index': ('/', False),
+    'reports': ('/reports', True),
+    'pdf': ('/reports/pdf', True),
+}
+LOADTEST_PASSWORD = 'loadtest'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=100)
+    parser.add_argument('--incidents', type=int, default=5000, help='SiteHistory rows')
+    parser.add_argument('--users', type=int, default=10, help='Operator accounts used by logged-in clients')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds of load')
+    parser.add_argument('--auth-ratio', type=float, default=0.5, help='Share of clients that log in')
+    parser.add_argument('--routes', default='index=10,reports=4,pdf=1',
+                        help='Route weights, e.g. index=10,reports=4,pdf=1 (pdf needs WeasyPrint)')
+    parser.add_argument('--gunicorn', type=int, metavar='WORKERS', default=0,
+                        help='Start a local Gunicorn with this many workers instead of the in-process client')
+    parser.add_argument('--url', help='Existing server to test (no seeding); needs --username/--password')
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument('--output', help='Results file (default loadtest-results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='Fail if any route p95 gets this many percent slower than --compare')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+# --- Seeding ---
+
+def seed_database(args):
+    """
+    Creates a throwaway SQLite database and fills it. Must run before the app
+    is imported, since config reads DATABASE_URL at import time.
+    """
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'sites.db')
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app, init_db
+    from app.extensions import db
+    from app.models import Site, SiteHistory, User
+
+    rng = random.Random(args.seed)
+    app = create_app(start_scheduler=False)
+    init_db(app)
+    with app.app_context():
+        now = datetime.now()
+        statuses = ['online'] * 8 + ['warning', 'offline']
+        sites = [
+            Site(name=f'Site {i:05d}', url=f'https://site{i}.example.org/', status=rng.choice(statuses),
+                 last_checked=now - timedelta(seconds=rng.randint(0, 3600)))
+            for i in range(args.sites)
+        ]
+        db.session.add_all(sites)
+        db.session.flush()
+
+        history = []
+        for _ in range(args.incidents):
+            site = rng.choice(sites)
+            start = now - timedelta(minutes=rng.randint(10, 60 * 24 * 365))
+            history.append({
+                'site_id': site.id,
+                'site_name': site.name,
+                'status': 'offline',
+                'start_time': start,
+                'end_time': start + timedelta(minutes=rng.randint(15, 600)),
+                'error_message': rng.choice(['Status Code: 503', 'Status Code: 500', 'Connection Error: timed out']),
+            })
+        db.session.bulk_insert_mappings(SiteHistory, history)
+
+        password_hash = generate_password_hash(LOADTEST_PASSWORD, method='pbkdf2:sha256')
+        db.session.add_all([
+            User(username=f'loadtest{i}', password_hash=password_hash, name=f'Load Test {i}',
+                 role='operator', email=f'loadtest{i}@example.org', is_default_password=False)
+            for i in range(args.users)
+        ])
+        db.session.commit()
+
+    print(f"Seeded {args.sites} sites, {args.incidents} incidents, {args.users} users in {workdir}")
+    return app, workdir
+
+# --- Clients ---
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def login(self, username, password):
+        self.client.post('/login', data={'username': username, 'password': password})
+
+    def get(self, path):
+        response = self.client.get(path)
+        response.close()
+        return response.status_code
+
+class HTTPClient:
+    def __init__(self, base_url):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def login(self, username, password):
+        self.session.post(self.base_url + '/login', data={'username': username, 'password': password},
+                          allow_redirects=False)
+
+    def get(self, path):
+        # No redirects: a bounce to /login must show up as a failure, not as a fast 200
+        return self.session.get(self.base_url + path, allow_redirects=False, timeout=120).status_code
+
+def run_load(make_client, credentials, args, weights):
+    """
+    Runs `concurrency` clients for `duration` seconds. Logged-in clients
+    request any route; anonymous ones only public routes.
+    """
+    samples = {route: [] for route in weights} # route -> [(seconds, status)]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def worker(index):
+        rng = random.Random(args.seed + index)
+        client = make_client()
+        logged_in = credentials and index < round(args.concurrency * args.auth_ratio)
+        if logged_in:
+            client.login(*credentials[index % len(credentials)])
+        routes = [route for route in weights if logged_in or not ROUTES[route][1]]
+        if not routes:
+            return
+        route_weights = [weights[route] for route in routes]
+
+        local = []
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, route_weights)[0]
+            started = time.perf_counter()
+            try:
+                status = client.get(ROUTES[route][0])
+            except Exception as e:
+                status = f'error: {type(e).__name__}'
+            local.append((route, time.perf_counter() - started, status))
+        with lock:
+            for route, seconds, status in local:
+                samples[route].append((seconds, status))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+def summarize(samples, elapsed):
+    from app.services.stats_service import percentile
+
+    summary = {}
+    for route, route_samples in samples.items():
+        if not route_samples:
+            continue
+        latencies = sorted(seconds * 1000 for seconds, _ in route_samples)
+        failures = [status for _, status in route_samples if status != 200]
+        summary[route] = {
+            'requests': len(route_samples),
+            'rps': round(len(route_samples) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p95_ms': round(percentile(latencies, 95), 1),
+            'p99_ms': round(percentile(latencies, 99), 1),
+            'max_ms': round(latencies[-1], 1),
+            'errors': len(failures),
+            'error_statuses': sorted({str(status) for status in failures}),
+        }
+    return summary
+
+# --- Local Gunicorn ---
+
+def start_gunicorn(workers):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'wsgi:app'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=os.environ.copy(),
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            if process.poll() is not None:
+                raise SystemExit('Gunicorn exited during start-up')
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit('Gunicorn did not start listening in time')
+
+# --- Reporting ---
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_summary(summary):
+    print(f"{'Route':<10} {'req':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>6}")
+    for route, stats in summary.items():
+        print(f"{route:<10} {stats['requests']:>7} {stats['rps']:>8} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+              f"{stats['p99_ms']:>9} {stats['max_ms']:>9} {stats['errors']:>6}")
+
+def compare(summary, baseline_path, max_regression):
+    # Returns True when every route's p95 is within max_regression % of the baseline
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['routes']
+
+    ok = True
+    print(f"\nCompared with {baseline_path}:")
+    for route, stats in summary.items():
+        before = baseline.get(route)
+        if not before:
+            continue
+        change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        regressed = change > max_regression
+        ok = ok and not regressed
+        print(f"{route:<10} p95 {before['p95_ms']:>8} -> {stats['p95_ms']:>8} ms ({change:+.1f}%)"
+              f"{'  REGRESSION' if regressed else ''}   req/s {before['rps']} -> {stats['rps']}")
+    return ok
+
+def main():
+    args = parse_args()
+    weights = {}
+    for item in args.routes.split(','):
+        route, _, weight = item.partition('=')
+        if route not in ROUTES:
+            raise SystemExit(f"Unknown route '{route}' (known: {', '.join(ROUTES)})")
+        weights[route] = float(weight or 1)
+
+    process = workdir = None
+    try:
+        if args.url:
+            credentials = [(args.username, args.password)] if args.username else []
+            base_url, mode = args.url, 'url'
+            make_client = lambda: HTTPClient(base_url)
+        else:
+            app, workdir = seed_database(args)
+            credentials = [(f'loadtest{i}', LOADTEST_PASSWORD) for i in range(args.users)]
+            if args.gunicorn:
+                process, base_url = start_gunicorn(args.gunicorn)
+                mode = f'gunicorn x{args.gunicorn}'
+                make_client = lambda: HTTPClient(base_url)
+            else:
+                mode = 'in-process'
+                make_client = lambda: InProcessClient(app)
+
+        print(f"Load: {args.concurrency} clients ({args.auth_ratio:.0%} logged in) for {args.duration}s, mode {mode}")
+        samples, elapsed = run_load(make_client, credentials, args, weights)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = summarize(samples, elapsed)
+    print_summary(summary)
+
+    output = args.output or os.path.join('loadtest-results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'mode': mode,
+            'params': {key: getattr(args, key) for key in ('sites', 'incidents', 'users', 'concurrency',
+                                                           'duration', 'auth_ratio', 'routes', 'seed')},
+            'elapsed_s': round(elapsed, 2),
+            'routes': summary,
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare and not compare(summary, args.compare, args.max_regression):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Add site_check table (per-probe timings)
+
+Revision ID: 0a7d3e9b5c41
+Revises: f29c8d4e0a13
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0a7d3e9b5c41'
+down_revision = 'f29c8d4e0a13'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('site_check',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('site_id', sa.Integer(), nullable=False),
+        sa.Column('checked_at', sa.DateTime(), nullable=False),
+        sa.Column('ok', sa.Boolean(), nullable=False),
+        sa.Column('dns_ms', sa.Integer(), nullable=True),
+        sa.Column('connect_ms', sa.Integer(), nullable=True),
+        sa.Column('tls_ms', sa.Integer(), nullable=True),
+        sa.Column('ttfb_ms', sa.Integer(), nullable=True),
+        sa.Column('transfer_ms', sa.Integer(), nullable=True),
+        sa.Column('total_ms', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['site_id'], ['site.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('site_check', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_site_check_site_id'), ['site_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_site_check_checked_at'), ['checked_at'], unique=False)
+
+def downgrade():
+    with op.batch_alter_table('site_check', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_site_check_checked_at'))
+        batch_op.drop_index(batch_op.f('ix_site_check_site_id'))
+    op.drop_table('site_check')
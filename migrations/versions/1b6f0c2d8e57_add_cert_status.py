@@ -0,0 +1,29 @@
+"""Add cert_status table and cert_warning_days setting
+
+Revision ID: 1b6f0c2d8e57
+Revises: 0a7d3e9b5c41
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '1b6f0c2d8e57'
+down_revision = '0a7d3e9b5c41'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('cert_status',
+        sa.Column('host', sa.String(length=255), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('checked_at', sa.DateTime(), nullable=False),
+        sa.Column('error_message', sa.String(length=500), nullable=True),
+        sa.Column('notified_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('host')
+    )
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cert_warning_days', sa.Integer(), nullable=True, server_default='14'))
+
+def downgrade():
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.drop_column('cert_warning_days')
+    op.drop_table('cert_status')
@@ -0,0 +1,39 @@
+"""Add probe_task table (agent work queue)
+
+Revision ID: 2c9e4a7f1d36
+Revises: 1b6f0c2d8e57
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '2c9e4a7f1d36'
+down_revision = '1b6f0c2d8e57'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('probe_task',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('site_id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=32), nullable=True),
+        sa.Column('url', sa.String(length=500), nullable=False),
+        sa.Column('expected_text', sa.String(length=200), nullable=True),
+        sa.Column('validators', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('agent_id', sa.String(length=100), nullable=True),
+        sa.Column('lease_until', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('probe_task', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_probe_task_site_id'), ['site_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_probe_task_status'), ['status'], unique=False)
+
+def downgrade():
+    with op.batch_alter_table('probe_task', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_probe_task_status'))
+        batch_op.drop_index(batch_op.f('ix_probe_task_site_id'))
+    op.drop_table('probe_task')
@@ -0,0 +1,20 @@
+"""Add site_ids to monitor_job
+
+Revision ID: 3d1a6b8c2e94
+Revises: 2c9e4a7f1d36
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '3d1a6b8c2e94'
+down_revision = '2c9e4a7f1d36'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('monitor_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('site_ids', sa.Text(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('monitor_job', schema=None) as batch_op:
+        batch_op.drop_column('site_ids')
@@ -0,0 +1,28 @@
+"""Add updated_at to site and site_history
+
+Revision ID: 4e8b2f6a9c03
+Revises: 3d1a6b8c2e94
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '4e8b2f6a9c03'
+down_revision = '3d1a6b8c2e94'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('site_history', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_site_history_updated_at'), ['updated_at'], unique=False)
+
+def downgrade():
+    with op.batch_alter_table('site_history', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_site_history_updated_at'))
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,22 @@
+"""Add degraded state settings
+
+Revision ID: 5f3c9d1e7a26
+Revises: 4e8b2f6a9c03
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '5f3c9d1e7a26'
+down_revision = '4e8b2f6a9c03'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('degraded_sensitivity', sa.Float(), nullable=True, server_default='4'))
+        batch_op.add_column(sa.Column('degraded_latency_ms', sa.Integer(), nullable=True, server_default='10000'))
+
+def downgrade():
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.drop_column('degraded_latency_ms')
+        batch_op.drop_column('degraded_sensitivity')
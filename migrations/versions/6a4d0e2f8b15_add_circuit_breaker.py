@@ -0,0 +1,28 @@
+"""Add circuit breaker and probe timeout columns
+
+Revision ID: 6a4d0e2f8b15
+Revises: 5f3c9d1e7a26
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '6a4d0e2f8b15'
+down_revision = '5f3c9d1e7a26'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('breaker_failures', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('probe_task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('timeout', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('breaker_timeout', sa.Float(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('probe_task', schema=None) as batch_op:
+        batch_op.drop_column('breaker_timeout')
+        batch_op.drop_column('timeout')
+
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.drop_column('breaker_failures')
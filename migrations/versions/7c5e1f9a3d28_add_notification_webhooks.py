@@ -0,0 +1,22 @@
+"""Add webhook notification channels
+
+Revision ID: 7c5e1f9a3d28
+Revises: 6a4d0e2f8b15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '7c5e1f9a3d28'
+down_revision = '6a4d0e2f8b15'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('webhook_url', sa.String(length=500), nullable=True))
+        batch_op.add_column(sa.Column('chat_webhook_url', sa.String(length=500), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.drop_column('chat_webhook_url')
+        batch_op.drop_column('webhook_url')
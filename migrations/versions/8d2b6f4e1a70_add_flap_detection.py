@@ -0,0 +1,28 @@
+"""Add flap detection
+
+Revision ID: 8d2b6f4e1a70
+Revises: 7c5e1f9a3d28
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '8d2b6f4e1a70'
+down_revision = '7c5e1f9a3d28'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recent_transitions', sa.Text(), nullable=True))
+
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('flap_threshold', sa.Integer(), nullable=True, server_default='4'))
+        batch_op.add_column(sa.Column('flap_window', sa.Integer(), nullable=True, server_default='60'))
+
+def downgrade():
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.drop_column('flap_window')
+        batch_op.drop_column('flap_threshold')
+
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.drop_column('recent_transitions')
@@ -0,0 +1,24 @@
+"""Add site dependencies
+
+Revision ID: 9e1c7a5b3f42
+Revises: 8d2b6f4e1a70
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '9e1c7a5b3f42'
+down_revision = '8d2b6f4e1a70'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('parent_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_site_parent_id'), ['parent_id'], unique=False)
+        batch_op.create_foreign_key('fk_site_parent_id_site', 'site', ['parent_id'], ['id'])
+
+def downgrade():
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_site_parent_id_site', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_site_parent_id'))
+        batch_op.drop_column('parent_id')
@@ -0,0 +1,30 @@
+"""Add per-state check cadences
+
+Revision ID: d4e7a1c2b9f0
+Revises: c123456789ab
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'd4e7a1c2b9f0'
+down_revision = 'c123456789ab'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('interval_warning', sa.Integer(), nullable=True, server_default='5'))
+        batch_op.add_column(sa.Column('interval_offline', sa.Integer(), nullable=True, server_default='30'))
+
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('check_interval', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('retry_interval', sa.Integer(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.drop_column('retry_interval')
+        batch_op.drop_column('check_interval')
+
+    with op.batch_alter_table('global_settings', schema=None) as batch_op:
+        batch_op.drop_column('interval_offline')
+        batch_op.drop_column('interval_warning')
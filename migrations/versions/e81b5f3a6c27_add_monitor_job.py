@@ -0,0 +1,30 @@
+"""Add monitor_job table
+
+Revision ID: e81b5f3a6c27
+Revises: d4e7a1c2b9f0
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'e81b5f3a6c27'
+down_revision = 'd4e7a1c2b9f0'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('monitor_job',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('done', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('error_message', sa.String(length=500), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+def downgrade():
+    op.drop_table('monitor_job')
@@ -0,0 +1,26 @@
+"""Add conditional probe validators to site
+
+Revision ID: f29c8d4e0a13
+Revises: e81b5f3a6c27
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'f29c8d4e0a13'
+down_revision = 'e81b5f3a6c27'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('etag', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('last_modified', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('text_match', sa.Boolean(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('site', schema=None) as batch_op:
+        batch_op.drop_column('text_match')
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('last_modified')
+        batch_op.drop_column('etag')
@@ -0,0 +1,151 @@
+"""
+Benchmark for the monitor's check loop (check_sites) at fleet scale.
+
+Seeds a temporary SQLite database with N sites and runs forced ticks with
+probe_site() replaced by an instant in-process fake, so what is measured is
+the loop's own cost (loading sites, the state machine, write-back), not the
+network. Reports wall and CPU time per tick and the peak memory allocated
+during a tick. Results are saved as JSON so runs can be compared.
+
+    python monitor_bench.py --sites 5000 --ticks 5
+    python monitor_bench.py --sites 5000 --compare monitor-bench-results/base.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=2000)
+    parser.add_argument('--ticks', type=int, default=5, help='Timed ticks (after one warm-up tick)')
+    parser.add_argument('--fail-rate', type=float, default=0.05, help='Share of probes that fail')
+    parser.add_argument('--output', help='Results file (default monitor-bench-results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def seed_database(args):
+    # Must run before the app is imported, since config reads DATABASE_URL at import time
+    workdir = tempfile.mkdtemp(prefix='monitor-bench-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'sites.db')
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+
+    from app import create_app, init_db
+    from app.extensions import db
+    from app.models import Site
+
+    app = create_app(start_scheduler=False)
+    # Snapshots and the static status page go to the throwaway directory too
+    app.instance_path = workdir
+    init_db(app)
+    with app.app_context():
+        now = datetime.now()
+        db.session.bulk_insert_mappings(Site, [
+            {'name': f'Site {i:05d}', 'url': f'https://site{i}.example.org/', 'status': 'online',
+             'breaker_failures': 0, 'last_checked': now - timedelta(hours=1)}
+            for i in range(args.sites)
+        ])
+        db.session.commit()
+    print(f"Seeded {args.sites} sites in {workdir}")
+    return app, workdir
+
+def fake_probe(rng, fail_rate):
+    from app.services.probe_service import ProbeResult
+
+    def probe_site(url, expected_text=None, validators=None, **options):
+        if rng.random() < fail_rate:
+            return ProbeResult(False, 'Connection Error: benchmark')
+        total = rng.uniform(50, 300)
+        return ProbeResult(True, timings={'dns': 1.0, 'connect': 5.0, 'tls': 10.0, 'ttfb': total - 20,
+                                          'transfer': 4.0, 'total': total})
+    return probe_site
+
+def run_ticks(app, args):
+    from app.services import monitor_service
+    from app.services.write_behind import write_behind
+
+    # As in the dedicated monitor process (flask monitor run)
+    write_behind.enabled = True
+    monitor_service.probe_site = fake_probe(random.Random(args.seed), args.fail_rate)
+
+    def tick():
+        # The loop logs every site; that is not what is being measured
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            monitor_service.check_sites(app, force=True)
+
+    tick() # Warm-up: first run fills caches and opens connections
+    wall, cpu = [], []
+    for _ in range(args.ticks):
+        started, started_cpu = time.perf_counter(), time.process_time()
+        tick()
+        wall.append((time.perf_counter() - started) * 1000)
+        cpu.append((time.process_time() - started_cpu) * 1000)
+
+    tracemalloc.start()
+    tick()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wall.sort()
+    cpu.sort()
+    return {
+        'wall_ms_median': round(wall[len(wall) // 2], 1),
+        'wall_ms_min': round(wall[0], 1),
+        'cpu_ms_median': round(cpu[len(cpu) // 2], 1),
+        'peak_alloc_kb': round(peak / 1024),
+    }
+
+def compare(summary, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['tick']
+    print(f"\nCompared with {baseline_path}:")
+    for key, value in summary.items():
+        before = baseline.get(key)
+        if before:
+            print(f"{key:<16} {before:>10} -> {value:>10} ({(value - before) / before * 100:+.1f}%)")
+
+def git_revision():
+    import subprocess
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    args = parse_args()
+    app, workdir = seed_database(args)
+    try:
+        print(f"Ticks: {args.ticks} forced check_sites runs over {args.sites} sites "
+              f"({args.fail_rate:.0%} of probes failing)")
+        summary = run_ticks(app, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for key, value in summary.items():
+        print(f"{key:<16} {value:>10}")
+
+    output = args.output or os.path.join('monitor-bench-results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'params': {key: getattr(args, key) for key in ('sites', 'ticks', 'fail_rate', 'seed')},
+            'tick': summary,
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare(summary, args.compare)
+
+if __name__ == '__main__':
+    sys.exit(main())
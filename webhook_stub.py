@@ -0,0 +1,75 @@
+"""
+Local webhook receiver for testing notification channels.
+
+Prints every JSON body it receives. It can also fail or stall on purpose,
+which exercises the dispatcher's retries and shows that slow channels do not
+hold up monitoring.
+
+    python webhook_stub.py --port 8099
+    python webhook_stub.py --port 8099 --fail-rate 0.5 --delay 3
+
+Then set http://127.0.0.1:8099/hook as the webhook URL in Settings (or
+/chat for the chat webhook) and run `flask --app wsgi monitor notify-test`.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of requests answered with HTTP 500')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before answering')
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args()
+
+def make_handler(args):
+    rng = random.Random(args.seed)
+    lock = threading.Lock()
+    counts = {'received': 0, 'failed': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if args.delay:
+                time.sleep(args.delay)
+            with lock:
+                counts['received'] += 1
+                fail = rng.random() < args.fail_rate
+                counts['failed'] += fail
+                number = counts['received']
+
+            try:
+                payload = json.loads(body or b'null')
+            except ValueError:
+                payload = body.decode('utf-8', 'replace')
+            status = 500 if fail else 200
+            print(f"#{number} {self.path} -> {status}\n{json.dumps(payload, indent=2, ensure_ascii=False)}", flush=True)
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/plain')
+            self.end_headers()
+            self.wfile.write(b'fail' if fail else b'ok')
+
+        def log_message(self, format, *args):
+            pass # The body dump above is the log
+
+    return Handler
+
+def main():
+    args = parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"Listening on http://{args.host}:{args.port}/ (fail rate {args.fail_rate:.0%}, delay {args.delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()